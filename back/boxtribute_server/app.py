@@ -4,9 +4,11 @@ import os
 import sentry_sdk
 from flask import Flask
 from graphql.error import GraphQLError
+from peewee import OperationalError
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 from .db import create_db_interface, db
+from .reference_data import invalidate_reference_data, warm_reference_data_cache
 
 
 def create_app():
@@ -15,13 +17,14 @@ def create_app():
 
 def configure_app(app, *blueprints, database_interface=None, **mysql_kwargs):
     """Register blueprints. Configure the app's database interface. `mysql_kwargs` are
-    forwarded.
+    forwarded. Cached reference data from a previously configured database is discarded.
     """
     for blueprint in blueprints:
         app.register_blueprint(blueprint)
 
     app.config["DATABASE"] = database_interface or create_db_interface(**mysql_kwargs)
     db.init_app(app)
+    invalidate_reference_data()
 
 
 def main(*blueprints):
@@ -70,4 +73,9 @@ def main(*blueprints):
         database=os.environ["MYSQL_DB"],
         unix_socket=os.getenv("MYSQL_SOCKET"),
     )
+    try:
+        warm_reference_data_cache()
+    except OperationalError:
+        # Database not reachable yet. The cache is populated on the first request
+        pass
     return app
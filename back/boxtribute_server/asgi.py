@@ -0,0 +1,274 @@
+"""Construction of ASGI applications for web app and API.
+
+The GraphQL endpoints are served by Ariadne's ASGI application. Authentication, the
+beta-feature check, request logging, and GraphQL execution involve blocking calls
+(Auth0 service, Google Cloud logging, peewee database access). They run in a bounded
+pool of worker threads, such that concurrent requests on one instance overlap their
+I/O, while the event loop of the ASGI server is kept free for accepting requests.
+Each worker thread executes the GraphQL request in its own long-lived event loop (see
+`graph_ql.execution`), hence DataLoaders keep batching within a request.
+"""
+import asyncio
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ariadne.asgi import GraphQL
+from ariadne.asgi.handlers import GraphQLHTTPHandler
+from ariadne.exceptions import HttpError
+from flask import g
+from sentry_sdk import set_user as set_sentry_user
+from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from .auth import authenticate, get_token_from_auth_header, request_jwt
+from .authz import check_beta_feature_access
+from .db import db
+from .exceptions import (
+    AuthenticationFailed,
+    PersistedQueryError,
+    format_database_errors,
+)
+from .graph_ql.cost import query_api_max_cost
+from .graph_ql.execution import (
+    create_context,
+    execute_graphql,
+    report_sql_statistics,
+    run_in_worker_event_loop,
+)
+from .graph_ql.persisted_queries import resolve_persisted_query
+from .graph_ql.schema import full_api_schema, query_api_schema
+from .instrumentation import record_sql_queries
+from .logging import API_CONTEXT, WEBAPP_CONTEXT, log_request_to_gcloud
+from .routes import CORS_HEADERS, CORS_ORIGINS, PLAYGROUND_HTML
+from .utils import in_development_environment
+
+# Maximum number of requests that are processed concurrently per instance. Every worker
+# thread holds its own database connection while processing a request
+DEFAULT_MAX_WORKER_THREADS = 8
+
+
+class BoxtributeGraphQLHTTPHandler(GraphQLHTTPHandler):
+    """Handler for GraphQL requests via HTTP. In addition to Ariadne's default handler,
+    the requesting user is authenticated, the request is logged, and (optionally)
+    checked for access to beta features.
+    """
+
+    def __init__(
+        self,
+        *,
+        flask_app,
+        executor,
+        log_context,
+        check_beta_features,
+        max_query_cost=None,
+    ):
+        """The Flask app provides configuration and the database interface. An app
+        context is pushed for executing a GraphQL request such that resolvers can access
+        the current user via the `g` object.
+        If `max_query_cost` is given, queries exceeding it are rejected.
+        """
+        super().__init__()
+        self.flask_app = flask_app
+        self.executor = executor
+        self.log_context = log_context
+        self.check_beta_features = check_beta_features
+        self.max_query_cost = max_query_cost
+
+    async def handle_request(self, request):
+        if request.method == "GET":
+            return HTMLResponse(PLAYGROUND_HTML)
+        if request.method == "POST":
+            return await self.graphql_http_server(request)
+        return self.handle_not_allowed_method(request)
+
+    async def graphql_http_server(self, request):
+        try:
+            token = get_token_from_auth_header(request.headers.get("Authorization"))
+        except AuthenticationFailed as e:
+            return JSONResponse(e.error, status_code=e.status_code)
+
+        try:
+            data = await self.extract_data_from_request(request)
+        except HttpError as error:
+            return PlainTextResponse(error.message or error.status, status_code=400)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(self.process_request, token, data)
+        )
+
+    async def execute_graphql_query(self, request, data, **kwargs):
+        return await execute_graphql(
+            self.schema,
+            data,
+            context_value=create_context(),
+            debug=self.debug,
+            introspection=self.introspection,
+            error_formatter=self.error_formatter,
+            max_cost=self.max_query_cost,
+        )
+
+    def process_request(self, token, data):
+        """Authenticate the user and execute the GraphQL request. Return the response.
+        This method is run in a worker thread.
+        """
+        try:
+            payload, user = authenticate(
+                token,
+                domain=os.environ["AUTH0_DOMAIN"],
+                audience=os.environ["AUTH0_AUDIENCE"],
+            )
+        except AuthenticationFailed as e:
+            return JSONResponse(e.error, status_code=e.status_code)
+        set_sentry_user({"id": user.id, "jwt_payload": payload})
+
+        try:
+            data = resolve_persisted_query(data)
+        except PersistedQueryError as e:
+            return JSONResponse(
+                {"errors": [{"message": e.message, "extensions": e.extensions}]},
+                status_code=e.status_code,
+            )
+        log_request_to_gcloud(context=self.log_context, payload=data)
+
+        if self.check_beta_features and not check_beta_feature_access(
+            data["query"], current_user=user
+        ):
+            return JSONResponse(
+                {"error": "No permission to access beta feature"}, status_code=401
+            )
+
+        with self.flask_app.app_context(), db.database.connection_context():
+            g.user = user
+            with record_sql_queries() as recorder:
+                success, result = run_in_worker_event_loop(
+                    self.execute_graphql_query(None, data)
+                )
+        report_sql_statistics(
+            result,
+            recorder,
+            data=data,
+            debug=self.debug,
+            log_context=self.log_context,
+        )
+
+        status_code = 200 if success else 400
+        return JSONResponse(result, status_code=status_code)
+
+
+def _create_asgi_app(
+    flask_app,
+    *,
+    path,
+    schema,
+    log_context,
+    check_beta_features=False,
+    introspection=None,
+    max_query_cost=None,
+    routes=(),
+    middleware=(),
+    max_worker_threads=None,
+):
+    """Create Starlette app serving the GraphQL schema at the given path. Requests are
+    processed by a bounded pool of worker threads (default size: value of the
+    environment variable `ASGI_MAX_WORKER_THREADS`, or `DEFAULT_MAX_WORKER_THREADS`).
+    """
+    if max_worker_threads is None:
+        max_worker_threads = int(
+            os.getenv("ASGI_MAX_WORKER_THREADS", DEFAULT_MAX_WORKER_THREADS)
+        )
+    executor = ThreadPoolExecutor(
+        max_workers=max_worker_threads, thread_name_prefix="graphql-worker"
+    )
+
+    graphql_app = GraphQL(
+        schema,
+        http_handler=BoxtributeGraphQLHTTPHandler(
+            flask_app=flask_app,
+            executor=executor,
+            log_context=log_context,
+            check_beta_features=check_beta_features,
+            max_query_cost=max_query_cost,
+        ),
+        debug=flask_app.debug,
+        introspection=flask_app.debug if introspection is None else introspection,
+        error_formatter=format_database_errors,
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        executor.shutdown(wait=False)
+
+    app = Starlette(
+        routes=[Route(path, graphql_app, methods=["GET", "POST"]), *routes],
+        middleware=list(middleware),
+        lifespan=lifespan,
+    )
+    return SentryAsgiMiddleware(app)
+
+
+async def public(request):
+    response = (
+        "Hello from a public endpoint! You don't need to be authenticated to see this."
+    )
+    return JSONResponse({"message": response})
+
+
+async def api_token(request):
+    success, result = await run_in_threadpool(
+        request_jwt,
+        **await request.json(),  # must contain username and password
+        client_id=os.environ["AUTH0_CLIENT_ID"],
+        client_secret=os.environ["AUTH0_CLIENT_SECRET"],
+        audience=os.environ["AUTH0_AUDIENCE"],
+        domain=os.environ["AUTH0_DOMAIN"],
+    )
+    status_code = 200 if success else 400
+    return JSONResponse(result, status_code=status_code)
+
+
+def create_webapp_asgi_app(flask_app, **kwargs):
+    """Create ASGI app for the full GraphQL API, consumed by the front-end. Equivalent
+    to the `app_bp` blueprint. `kwargs` are forwarded.
+    """
+    return _create_asgi_app(
+        flask_app,
+        path="/graphql",
+        schema=full_api_schema,
+        log_context=WEBAPP_CONTEXT,
+        check_beta_features=True,
+        routes=[Route("/public", public, methods=["GET"])],
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=CORS_ORIGINS,
+                allow_methods=["POST"],
+                allow_headers=["*"] if in_development_environment() else CORS_HEADERS,
+            )
+        ],
+        **kwargs,
+    )
+
+
+def create_query_api_asgi_app(flask_app, **kwargs):
+    """Create ASGI app for the query-only GraphQL API. Equivalent to the `api_bp`
+    blueprint. `kwargs` are forwarded.
+    """
+    return _create_asgi_app(
+        flask_app,
+        path="/",
+        schema=query_api_schema,
+        log_context=API_CONTEXT,
+        introspection=True,
+        max_query_cost=query_api_max_cost(),
+        routes=[Route("/token", api_token, methods=["POST"])],
+        **kwargs,
+    )
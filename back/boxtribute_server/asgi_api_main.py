@@ -0,0 +1,6 @@
+"""Main entry point for query API served by an ASGI server"""
+from .app import main
+from .asgi import create_query_api_asgi_app
+from .routes import api_bp
+
+app = create_query_api_asgi_app(main(api_bp))
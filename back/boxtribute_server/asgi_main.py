@@ -0,0 +1,6 @@
+"""Main entry point for web application served by an ASGI server"""
+from .app import main
+from .asgi import create_webapp_asgi_app
+from .routes import app_bp
+
+app = create_webapp_asgi_app(main(app_bp))
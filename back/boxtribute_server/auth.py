@@ -1,6 +1,10 @@
 """Utilities for handling authentication"""
+import hashlib
 import json
+import math
 import os
+import threading
+import time
 import urllib
 from collections import defaultdict
 from functools import wraps
@@ -10,6 +14,7 @@ from flask import g, request
 from jose import JOSEError, jwt
 from sentry_sdk import set_user as set_sentry_user
 
+from .cache import CacheInfo, LRUCache
 from .exceptions import AuthenticationFailed
 
 JWT_CLAIM_PREFIX = "https://www.boxtribute.com"
@@ -56,7 +61,112 @@ def get_token_from_auth_header(header_string):
     return token
 
 
-def get_public_key(domain):
+JWKS_URL_TEMPLATE = "https://{domain}/.well-known/jwks.json"
+# Time (in seconds) for which fetched signing keys are considered valid
+JWKS_CACHE_TTL = 600
+# Minimum time (in seconds) between two fetches triggered by an unknown key ID. This
+# prevents clients from forcing a request to the Auth0 service with every token
+JWKS_MIN_REFRESH_INTERVAL = 30
+# Maximum number of verified tokens kept in memory
+VERIFIED_TOKEN_CACHE_SIZE = 1024
+
+
+class PublicKeyCache:
+    """Thread-safe in-memory cache of the JSON Web Key Sets (JWKS) that Auth0 publishes
+    for a domain.
+
+    The cached keys of a domain are fetched again when they have exceeded their time to
+    live, or when a key with an unknown ID is requested (i.e. the signing keys have
+    been rotated). Since the key ID is taken from an unverified token header, the
+    latter kind of refresh is rate-limited.
+    """
+
+    def __init__(
+        self, *, ttl=JWKS_CACHE_TTL, min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL
+    ):
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = threading.Lock()
+        # Mapping of domain to tuple of fetch time and mapping of key ID to key
+        self._key_sets = {}
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+
+    def get(self, domain, key_id=None):
+        """Return the public key with given ID for the domain. If no ID is given, return
+        the first key of the key set.
+        Raise AuthenticationFailed if no matching key exists.
+        """
+        with self._lock:
+            now = time.monotonic()
+            fetched_at, keys = self._key_sets.get(domain, (-math.inf, {}))
+            age = now - fetched_at
+            unknown = key_id is not None and key_id not in keys
+            if age > self.ttl or (unknown and age > self.min_refresh_interval):
+                self._misses += 1
+                if domain in self._key_sets:
+                    self._refreshes += 1
+                keys = self._fetch(domain)
+                self._key_sets[domain] = (now, keys)
+            else:
+                self._hits += 1
+
+        if key_id is None and keys:
+            return next(iter(keys.values()))
+        try:
+            return keys[key_id]
+        except KeyError:
+            raise AuthenticationFailed(
+                {
+                    "code": "invalid_header",
+                    "description": "Unable to find appropriate key.",
+                },
+            )
+
+    @staticmethod
+    def _fetch(domain):
+        """Fetch JWKS from Auth0 service and return mapping of key ID to key."""
+        with urllib.request.urlopen(JWKS_URL_TEMPLATE.format(domain=domain)) as url:
+            jwks = json.loads(url.read())
+        return {key["kid"]: key for key in jwks["keys"]}
+
+    def clear(self):
+        with self._lock:
+            self._key_sets.clear()
+            self._hits = 0
+            self._misses = 0
+            self._refreshes = 0
+
+    def cache_info(self):
+        """Return statistics about cache usage (similar to `functools.lru_cache`)."""
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                maxsize=None,
+                currsize=len(self._key_sets),
+                refreshes=self._refreshes,
+            )
+
+
+public_key_cache = PublicKeyCache()
+
+
+def get_key_id(token):
+    """Return the ID of the key that the token was signed with, or None if the token
+    header can't be parsed (the error is raised when decoding the token).
+    """
+    try:
+        return jwt.get_unverified_header(token).get("kid")
+    except JOSEError:
+        return None
+
+
+def get_public_key(domain, key_id=None):
+    """Return the public key with given ID for verifying JWTs issued by the Auth0
+    domain. The key set is cached (see `PublicKeyCache`).
+    """
     kid = os.getenv("AUTH0_JWKS_KID")
     n = os.getenv("AUTH0_JWKS_N")
     if kid and n:  # pragma: no cover
@@ -67,9 +177,7 @@ def get_public_key(domain):
             "kid": kid,
             "n": n,
         }
-    url = urllib.request.urlopen(f"https://{domain}/.well-known/jwks.json")
-    jwks = json.loads(url.read())
-    return jwks["keys"][0]
+    return public_key_cache.get(domain, key_id)
 
 
 def decode_jwt(*, token, public_key, domain, audience):
@@ -223,6 +331,32 @@ class CurrentUser:
         return self._is_god
 
 
+verified_token_cache = LRUCache(maxsize=VERIFIED_TOKEN_CACHE_SIZE)
+
+
+def authenticate(token, *, domain, audience):
+    """Verify the token, and return its payload and the user information contained.
+    The result is cached until the token expires, keyed by a digest of token, domain,
+    and audience. Hence the signature of a token that is sent repeatedly is only
+    verified once. Tokens without expiration time are not cached.
+    """
+    key = hashlib.sha256(f"{domain}\n{audience}\n{token}".encode()).digest()
+    result = verified_token_cache.get(key)
+    if result is not None:
+        return result
+
+    payload = decode_jwt(
+        token=token,
+        public_key=get_public_key(domain, key_id=get_key_id(token)),
+        domain=domain,
+        audience=audience,
+    )
+    result = payload, CurrentUser.from_jwt(payload)
+    if "exp" in payload:
+        verified_token_cache.set(key, result, expires_at=payload["exp"])
+    return result
+
+
 def requires_auth(f):
     """Decorator for an endpoint that requires user authentication. In case of failure,
     an exception incl. HTTP status code is raised. Flask handles it and returns an error
@@ -236,14 +370,11 @@ def requires_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = get_token_from_auth_header(get_auth_string_from_header())
-        domain = os.environ["AUTH0_DOMAIN"]
-        payload = decode_jwt(
-            token=token,
-            public_key=get_public_key(domain),
-            domain=domain,
+        payload, g.user = authenticate(
+            token,
+            domain=os.environ["AUTH0_DOMAIN"],
             audience=os.environ["AUTH0_AUDIENCE"],
         )
-        g.user = CurrentUser.from_jwt(payload)
         set_sentry_user({"id": g.user.id, "jwt_payload": payload})
 
         return f(*args, **kwargs)
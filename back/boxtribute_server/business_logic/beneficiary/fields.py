@@ -1,47 +1,29 @@
 from datetime import date
 
 from ariadne import ObjectType
-from peewee import fn
 
 from ...authz import authorize
 from ...enums import HumanGender, TaggableObjectType
-from ...models.definitions.tag import Tag
-from ...models.definitions.tags_relation import TagsRelation
-from ...models.definitions.transaction import Transaction
-from ...models.definitions.x_beneficiary_language import XBeneficiaryLanguage
 
 beneficiary = ObjectType("Beneficiary")
 
 
 @beneficiary.field("tags")
-def resolve_beneficiary_tags(beneficiary_obj, _):
+def resolve_beneficiary_tags(beneficiary_obj, info):
     authorize(permission="tag:read", base_id=beneficiary_obj.base_id)
-    return (
-        Tag.select()
-        .join(TagsRelation)
-        .where(
-            (TagsRelation.object_id == beneficiary_obj.id)
-            & (TagsRelation.object_type == TaggableObjectType.Beneficiary)
-        )
+    return info.context["tags_for_resource_loader"].load(
+        (TaggableObjectType.Beneficiary, beneficiary_obj.id)
     )
 
 
 @beneficiary.field("tokens")
-def resolve_beneficiary_tokens(beneficiary_obj, _):
-    authorize(permission="transaction:read")
-    # If the beneficiary has no transactions yet, the select query returns None
-    return (
-        Transaction.select(fn.sum(Transaction.tokens))
-        .where(Transaction.beneficiary == beneficiary_obj.id)
-        .scalar()
-        or 0
-    )
+def resolve_beneficiary_tokens(beneficiary_obj, info):
+    return info.context["tokens_for_beneficiary_loader"].load(beneficiary_obj.id)
 
 
 @beneficiary.field("transactions")
-def resolve_beneficiary_transactions(beneficiary_obj, _):
-    authorize(permission="transaction:read")
-    return Transaction.select().where(Transaction.beneficiary == beneficiary_obj.id)
+def resolve_beneficiary_transactions(beneficiary_obj, info):
+    return info.context["transactions_for_beneficiary_loader"].load(beneficiary_obj.id)
 
 
 @beneficiary.field("registered")
@@ -50,13 +32,8 @@ def resolve_beneficiary_registered(beneficiary_obj, _):
 
 
 @beneficiary.field("languages")
-def resolve_beneficiary_languages(beneficiary_obj, _):
-    return [
-        x.language.id
-        for x in XBeneficiaryLanguage.select().where(
-            XBeneficiaryLanguage.beneficiary == beneficiary_obj.id
-        )
-    ]
+def resolve_beneficiary_languages(beneficiary_obj, info):
+    return info.context["languages_for_beneficiary_loader"].load(beneficiary_obj.id)
 
 
 @beneficiary.field("gender")
@@ -82,6 +59,6 @@ def resolve_beneficiary_active(beneficiary_obj, _):
 
 
 @beneficiary.field("base")
-def resolve_beneficiary_base(beneficiary_obj, _):
+def resolve_beneficiary_base(beneficiary_obj, info):
     authorize(permission="base:read", base_id=beneficiary_obj.base_id)
-    return beneficiary_obj.base
+    return info.context["base_loader"].load(beneficiary_obj.base_id)
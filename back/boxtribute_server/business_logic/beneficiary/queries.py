@@ -16,10 +16,13 @@ def resolve_beneficiary(*_, id):
 
 
 @query.field("beneficiaries")
-def resolve_beneficiaries(*_, pagination_input=None, filter_input=None):
+def resolve_beneficiaries(
+    *_, pagination_input=None, filter_input=None, sort_input=None
+):
     filter_condition = derive_beneficiary_filter(filter_input)
     return load_into_page(
         Beneficiary,
         authorized_bases_filter(Beneficiary) & filter_condition,
         pagination_input=pagination_input,
+        sort_input=sort_input,
     )
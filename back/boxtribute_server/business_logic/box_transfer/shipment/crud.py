@@ -19,6 +19,7 @@ from ....models.definitions.shipment_detail import ShipmentDetail
 from ....models.definitions.tags_relation import TagsRelation
 from ....models.definitions.transfer_agreement import TransferAgreement
 from ....models.utils import utcnow
+from ...metrics.stock_overview import update_stock_overview
 from ..agreement.crud import retrieve_transfer_agreement_bases
 
 
@@ -274,6 +275,7 @@ def _update_shipment_with_received_boxes(
     }
 
     details = []
+    source_location_ids = []
     detail_ids = tuple(update_inputs)
     for detail in _retrieve_shipment_details(
         shipment.id, (ShipmentDetail.id << detail_ids), model=Shipment
@@ -297,6 +299,7 @@ def _update_shipment_with_received_boxes(
         detail.target_product = target_product_id
         detail.target_location = target_location_id
         detail.target_size = target_size_id
+        source_location_ids.append(detail.box.location_id)
         detail.box.product = target_product_id
         detail.box.location = target_location_id
         detail.box.size = target_size_id
@@ -308,6 +311,13 @@ def _update_shipment_with_received_boxes(
         Box.bulk_update(
             checked_in_boxes, [Box.state, Box.product, Box.location, Box.size]
         )
+        update_stock_overview(
+            removed=[
+                (location_id, box.number_of_items)
+                for location_id, box in zip(source_location_ids, checked_in_boxes)
+            ],
+            added=[(box.location_id, box.number_of_items) for box in checked_in_boxes],
+        )
         ShipmentDetail.bulk_update(
             details,
             [
@@ -1,7 +1,6 @@
 from ariadne import ObjectType
 
 from ....authz import authorize
-from ....models.definitions.shipment import Shipment
 from ....models.definitions.shipment_detail import ShipmentDetail
 
 shipment = ObjectType("Shipment")
@@ -15,86 +14,85 @@ def resolve_shipment_details(shipment_obj, _):
 
 
 @shipment.field("sourceBase")
-def resolve_shipment_source_base(shipment_obj, _):
+def resolve_shipment_source_base(shipment_obj, info):
     authorize(
         permission="base:read",
         base_ids=[shipment_obj.source_base_id, shipment_obj.target_base_id],
     )
-    return shipment_obj.source_base
+    return info.context["base_loader"].load(shipment_obj.source_base_id)
 
 
 @shipment.field("targetBase")
-def resolve_shipment_target_base(shipment_obj, _):
+def resolve_shipment_target_base(shipment_obj, info):
     authorize(
         permission="base:read",
         base_ids=[shipment_obj.source_base_id, shipment_obj.target_base_id],
     )
-    return shipment_obj.target_base
+    return info.context["base_loader"].load(shipment_obj.target_base_id)
 
 
-@shipment_detail.field("sourceProduct")
-def resolve_shipment_detail_source_product(detail_obj, _):
+async def _authorize_for_shipment_bases(detail_obj, info, *, permission):
+    shipment = await info.context["shipment_loader"].load(detail_obj.shipment_id)
     authorize(
-        permission="product:read",
-        base_ids=[
-            detail_obj.shipment.source_base_id,
-            detail_obj.shipment.target_base_id,
-        ],
+        permission=permission,
+        base_ids=[shipment.source_base_id, shipment.target_base_id],
+    )
+
+
+@shipment_detail.field("sourceProduct")
+async def resolve_shipment_detail_source_product(detail_obj, info):
+    await _authorize_for_shipment_bases(detail_obj, info, permission="product:read")
+    return await info.context["unfiltered_product_loader"].load(
+        detail_obj.source_product_id
     )
-    return detail_obj.source_product
 
 
 @shipment_detail.field("targetProduct")
-def resolve_shipment_detail_target_product(detail_obj, _):
-    authorize(
-        permission="product:read",
-        base_ids=[
-            detail_obj.shipment.source_base_id,
-            detail_obj.shipment.target_base_id,
-        ],
+async def resolve_shipment_detail_target_product(detail_obj, info):
+    await _authorize_for_shipment_bases(detail_obj, info, permission="product:read")
+    if detail_obj.target_product_id is None:
+        return
+    return await info.context["unfiltered_product_loader"].load(
+        detail_obj.target_product_id
     )
-    return detail_obj.target_product
 
 
 @shipment_detail.field("sourceLocation")
-def resolve_shipment_detail_source_location(detail_obj, _):
-    authorize(
-        permission="location:read",
-        base_ids=[
-            detail_obj.shipment.source_base_id,
-            detail_obj.shipment.target_base_id,
-        ],
+async def resolve_shipment_detail_source_location(detail_obj, info):
+    await _authorize_for_shipment_bases(detail_obj, info, permission="location:read")
+    return await info.context["unfiltered_location_loader"].load(
+        detail_obj.source_location_id
     )
-    return detail_obj.source_location
 
 
 @shipment_detail.field("targetLocation")
-def resolve_shipment_detail_target_location(detail_obj, _):
-    authorize(
-        permission="location:read",
-        base_ids=[
-            detail_obj.shipment.source_base_id,
-            detail_obj.shipment.target_base_id,
-        ],
+async def resolve_shipment_detail_target_location(detail_obj, info):
+    await _authorize_for_shipment_bases(detail_obj, info, permission="location:read")
+    if detail_obj.target_location_id is None:
+        return
+    return await info.context["unfiltered_location_loader"].load(
+        detail_obj.target_location_id
     )
-    return detail_obj.target_location
 
 
 @shipment_detail.field("sourceSize")
-def resolve_shipment_detail_source_size(detail_obj, _):
-    authorize(permission="size:read")
-    return detail_obj.source_size
+def resolve_shipment_detail_source_size(detail_obj, info):
+    return info.context["size_loader"].load(detail_obj.source_size_id)
 
 
 @shipment_detail.field("targetSize")
-def resolve_shipment_detail_target_size(detail_obj, _):
-    authorize(permission="size:read")
-    return detail_obj.target_size
+def resolve_shipment_detail_target_size(detail_obj, info):
+    if detail_obj.target_size_id is None:
+        authorize(permission="size:read")
+        return
+    return info.context["size_loader"].load(detail_obj.target_size_id)
 
 
 @shipment_detail.field("shipment")
-def resolve_shipment(shipment_detail_obj, _):
-    shipment = Shipment.get_by_id(shipment_detail_obj.shipment_id)
+async def resolve_shipment(shipment_detail_obj, info):
+    shipment = await info.context["shipment_loader"].load(
+        shipment_detail_obj.shipment_id
+    )
     authorize(
         permission="shipment:read",
         base_ids=[shipment.source_base_id, shipment.target_base_id],
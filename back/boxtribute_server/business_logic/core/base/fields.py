@@ -52,12 +52,17 @@ def resolve_base_tags(base_obj, _, resource_type=None):
 
 
 @base.field("beneficiaries")
-def resolve_base_beneficiaries(base_obj, _, pagination_input=None, filter_input=None):
+def resolve_base_beneficiaries(
+    base_obj, _, pagination_input=None, filter_input=None, sort_input=None
+):
     authorize(permission="beneficiary:read", base_id=base_obj.id)
     base_filter_condition = Beneficiary.base == base_obj.id
     filter_condition = base_filter_condition & derive_beneficiary_filter(filter_input)
     return load_into_page(
-        Beneficiary, filter_condition, pagination_input=pagination_input
+        Beneficiary,
+        filter_condition,
+        pagination_input=pagination_input,
+        sort_input=sort_input,
     )
 
 
@@ -161,3 +166,8 @@ def resolve_distribution_events_in_return_state(base_obj, *_):
     return get_base_distribution_events(
         base_id=base_obj.id, states=[DistributionEventState.ReturnedFromDistribution]
     )
+
+
+@base.field("organisation")
+def resolve_base_organisation(base_obj, info):
+    return info.context["organisation_loader"].load(base_obj.organisation_id)
@@ -14,11 +14,14 @@ def resolve_product_category_has_gender(product_category_obj, _):
 
 
 @product_category.field("products")
-def resolve_product_category_products(product_category_obj, _, pagination_input=None):
+def resolve_product_category_products(
+    product_category_obj, _, pagination_input=None, sort_input=None
+):
     category_filter_condition = Product.category == product_category_obj.id
     return load_into_page(
         Product,
         authorized_bases_filter(Product),
         category_filter_condition,
         pagination_input=pagination_input,
+        sort_input=sort_input,
     )
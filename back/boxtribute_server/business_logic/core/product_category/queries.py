@@ -2,6 +2,7 @@ from ariadne import QueryType
 
 from ....authz import authorize
 from ....models.definitions.product_category import ProductCategory
+from ....reference_data import get_reference_data
 
 query = QueryType()
 
@@ -15,4 +16,4 @@ def resolve_product_category(*_, id):
 @query.field("productCategories")
 def resolve_product_categories(*_):
     authorize(permission="category:read")
-    return ProductCategory.select()
+    return list(get_reference_data().product_categories.values())
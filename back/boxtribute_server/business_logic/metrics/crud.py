@@ -1,13 +1,28 @@
 """Computation of various metrics"""
-from peewee import JOIN, fn
+import os
 
+from peewee import JOIN, SQL, DateField, Select, fn
+
+from ...db import db
+from ...enums import TimeseriesInterval
 from ...models.definitions.base import Base
 from ...models.definitions.beneficiary import Beneficiary
 from ...models.definitions.box import Box
+from ...models.definitions.daily_sales import DailySales
+from ...models.definitions.daily_served_beneficiary import DailyServedBeneficiary
 from ...models.definitions.location import Location
 from ...models.definitions.product import Product
 from ...models.definitions.product_category import ProductCategory
+from ...models.definitions.stock_overview_counter import StockOverviewCounter
 from ...models.definitions.transaction import Transaction
+from .rollups import get_watermark, in_days, not_in_days, rolled_up_days
+from .stock_overview import STOCK_OVERVIEW_WATERMARK, in_stock_location
+
+SALES_METRICS = {
+    "number_of_sales",
+    "number_of_families_served",
+    "number_of_beneficiaries_served",
+}
 
 
 def _build_range_filter(field, *, low, high):
@@ -25,110 +40,231 @@ def _build_range_filter(field, *, low, high):
     return filter_
 
 
-def _served_beneficiaries(date_filter):
+def _served_beneficiaries(*, date_filter, days):
     """Return IDs of beneficiaries that participated in a sale acc. to given
-    `date_filter`.
+    `date_filter`. Use the daily rollups of served beneficiaries for the given days (if
+    any), and select the remainder from the transactions.
     """
-    return (
+    served_beneficiaries = (
         Beneficiary.select(Beneficiary.id)
         .join(Transaction, JOIN.LEFT_OUTER)
-        .where((date_filter) & (Transaction.count > 0) & (Transaction.tokens >= 0))
+        .where(
+            (date_filter)
+            & (not_in_days(Transaction.created_on, days))
+            & (Transaction.count > 0)
+            & (Transaction.tokens >= 0)
+        )
     ).distinct()
+    if days is None:
+        return served_beneficiaries
+    return served_beneficiaries | DailyServedBeneficiary.select(
+        DailyServedBeneficiary.beneficiary
+    ).where(in_days(DailyServedBeneficiary.date, days))
 
 
-def compute_number_of_beneficiaries_served(*, organisation_id, after, before):
-    """Like `compute_number_of_families_served` but add up all members of served
-    families.
+def _number_of_sales(*, organisation_id, date_filter, days):
+    """Return query for the number of sales performed by `organisation_id` acc. to given
+    `date_filter`. Sum up the daily rollups of sales for the given days (if any), and
+    the sales of the remainder.
     """
-    date_filter = _build_range_filter(Transaction.created_on, low=after, high=before)
-    served_beneficiaries = _served_beneficiaries(date_filter)
+    number_of_sales = fn.COALESCE(fn.SUM(Transaction.count), 0)
+    if days is not None:
+        rolled_up_sales = (
+            DailySales.select(fn.SUM(DailySales.number_of_sales))
+            .join(Base)
+            .where(
+                (in_days(DailySales.date, days))
+                & (Base.organisation == organisation_id)
+            )
+        )
+        number_of_sales += fn.COALESCE(rolled_up_sales, 0)
     return (
-        Beneficiary.select()
+        Transaction.select(number_of_sales.alias("number_of_sales"))
+        .join(Beneficiary)
         .join(Base)
         .where(
-            (Base.organisation == organisation_id)
-            & (
-                (Beneficiary.family_head << served_beneficiaries)
-                | (Beneficiary.id << served_beneficiaries)
+            (date_filter)
+            & (not_in_days(Transaction.created_on, days))
+            & (Base.organisation == organisation_id)
+            & (Transaction.tokens >= 0)
+        )
+    )
+
+
+def _is_served(beneficiary_id, *, date_filter, days):
+    """Return condition selecting rows whose `beneficiary_id` field references a
+    beneficiary that participated in a sale acc. to given `date_filter`, as EXISTS
+    semi-join(s) on the transactions (and the daily rollups of served beneficiaries for
+    the given days, if any). The lookups use the indexes on `(people_id,
+    transaction_date)` and `(people_id, date)`, respectively.
+    """
+    condition = fn.EXISTS(
+        Transaction.select(SQL("1")).where(
+            (Transaction.beneficiary == beneficiary_id)
+            & (date_filter)
+            & (not_in_days(Transaction.created_on, days))
+            & (Transaction.count > 0)
+            & (Transaction.tokens >= 0)
+        )
+    )
+    if days is not None:
+        condition |= fn.EXISTS(
+            DailyServedBeneficiary.select(SQL("1")).where(
+                (DailyServedBeneficiary.beneficiary == beneficiary_id)
+                & (in_days(DailyServedBeneficiary.date, days))
             )
         )
-        .count()
+    return condition
+
+
+def _count_served_with_semi_joins(*, organisation_id, date_filter, days):
+    """Return query for the number of families and beneficiaries served. The served
+    beneficiaries of the organisation (i.e. family heads) and the members of served
+    families are selected by two lookups with semi-joins. Their union is counted.
+    """
+
+    def beneficiaries_of_organisation():
+        return (
+            Beneficiary.select(Beneficiary.id)
+            .join(Base)
+            .where(Base.organisation == organisation_id)
+        )
+
+    served_families = beneficiaries_of_organisation().where(
+        _is_served(Beneficiary.id, date_filter=date_filter, days=days)
+    )
+    members_of_served_families = beneficiaries_of_organisation().where(
+        _is_served(Beneficiary.family_head, date_filter=date_filter, days=days)
+    )
+    served_beneficiaries = (served_families | members_of_served_families).alias(
+        "served_beneficiaries"
     )
+    return Select(
+        (served_beneficiaries,),
+        (
+            fn.COUNT(SQL("*")).alias("number_of_beneficiaries_served"),
+            served_families.select(fn.COUNT(Beneficiary.id)).alias(
+                "number_of_families_served"
+            ),
+        ),
+    ).bind(db.database)
 
 
-def compute_number_of_families_served(*, organisation_id, after, before):
-    """Construct filter for date range, if at least one of `after` or `before` is given.
-    Compute number of families managed by `organisation_id` that were served in that
-    date range (default to all time).
+def _count_served_with_or(*, organisation_id, date_filter, days):
+    """Return query for the number of families and beneficiaries served. The served
+    beneficiaries are selected once as common table expression, and the beneficiaries
+    of the organisation are scanned once, filtering by
+    `family_head IN served OR id IN served`.
     """
-    date_filter = _build_range_filter(Transaction.created_on, low=after, high=before)
+    served = _served_beneficiaries(date_filter=date_filter, days=days).cte(
+        "served_beneficiaries"
+    )
+    # Unlike `served.select_from()`, a plain Select does not repeat the WITH clause
+    served_ids = Select((served,), (served.c.id,))
+    # Served families are the beneficiaries that have a match in the served
+    # beneficiaries; their family members are added up
     return (
-        Beneficiary.select()
+        Beneficiary.select(
+            fn.COUNT(Beneficiary.id).alias("number_of_beneficiaries_served"),
+            fn.COUNT(served.c.id).alias("number_of_families_served"),
+        )
         .join(Base)
+        .switch(Beneficiary)
+        .join(served, JOIN.LEFT_OUTER, on=(served.c.id == Beneficiary.id))
         .where(
             (Base.organisation == organisation_id)
-            & (Beneficiary.id << (_served_beneficiaries(date_filter)))
+            & ((Beneficiary.family_head << served_ids) | (served.c.id.is_null(False)))
         )
-        .count()
+        .with_cte(served)
     )
 
 
-def compute_number_of_sales(*, organisation_id, after, before):
+SERVED_BENEFICIARIES_ENGINES = {
+    "semi_join": _count_served_with_semi_joins,
+    "or": _count_served_with_or,
+}
+DEFAULT_METRICS_QUERY_ENGINE = "semi_join"
+
+
+def metrics_query_engine():
+    """Return the name of the engine for computing the number of families and
+    beneficiaries served (one of `SERVED_BENEFICIARIES_ENGINES`).
+    """
+    return os.getenv("METRICS_QUERY_ENGINE", DEFAULT_METRICS_QUERY_ENGINE)
+
+
+def compute_sales_metrics(
+    *, organisation_id, after, before, names, watermark, engine=None
+):
     """Construct filter for date range, if at least one of `after` or `before` is given.
-    Compute number of sales performed by `organisation_id` in that date range (default
-    to all time).
+    Compute the metrics with given names (any of `SALES_METRICS`) for `organisation_id`
+    in that date range (default to all time) in a single query, taking rollups up to
+    the given watermark into account. Return a dictionary of metric names and values.
+    - number_of_sales: number of sales performed by the organisation
+    - number_of_families_served: number of families managed by the organisation that
+      were served
+    - number_of_beneficiaries_served: like number_of_families_served but add up all
+      members of served families
+    The latter two are computed by the given engine (default: acc. to
+    `metrics_query_engine()`).
     """
     date_filter = _build_range_filter(Transaction.created_on, low=after, high=before)
-    return (
-        Transaction.select(fn.sum(Transaction.count))
-        .join(Beneficiary)
-        .join(Base)
-        .where(
-            (date_filter)
-            & (Base.organisation == organisation_id)
-            & (Transaction.tokens >= 0)
-        )
-        .scalar()  # returns None if no Transactions selected
-        or 0
+    days = rolled_up_days(after=after, before=before, watermark=watermark)
+    number_of_sales = _number_of_sales(
+        organisation_id=organisation_id, date_filter=date_filter, days=days
     )
+    if not names & {"number_of_families_served", "number_of_beneficiaries_served"}:
+        return {"number_of_sales": number_of_sales.scalar()}
+
+    count_served = SERVED_BENEFICIARIES_ENGINES[engine or metrics_query_engine()]
+    metrics = count_served(
+        organisation_id=organisation_id, date_filter=date_filter, days=days
+    )
+    if "number_of_sales" in names:
+        metrics = metrics.select_extend(
+            fn.COALESCE(number_of_sales, 0).alias("number_of_sales")
+        )
+    return metrics.dicts().get()
 
 
 def compute_stock_overview(*, organisation_id):
     """Compute number of boxes, and number of contained items, managed by
-    `organisation_id`.
+    `organisation_id`. Read the maintained counters of the organisation's bases if they
+    have been reconciled; otherwise count the boxes.
     """
-    overview = (
-        Box.select(
-            fn.sum(Box.number_of_items).alias("number_of_items"),
-            fn.Count(Box.id).alias("number_of_boxes"),
+    if get_watermark(STOCK_OVERVIEW_WATERMARK) is not None:
+        overview = (
+            StockOverviewCounter.select(
+                fn.SUM(StockOverviewCounter.number_of_items).alias("number_of_items"),
+                fn.COALESCE(fn.SUM(StockOverviewCounter.number_of_boxes), 0).alias(
+                    "number_of_boxes"
+                ),
+            )
+            .join(Base)
+            .where(Base.organisation == organisation_id)
+            .get()
         )
-        .join(Location)
-        .join(Base)
-        .where(
-            (Base.organisation == organisation_id)
-            & (Location.visible == 1)
-            & (Location.is_lost != 1)
-            & (Location.is_scrap != 1)
-            & (Location.is_donated != 1)
+    else:
+        overview = (
+            Box.select(
+                fn.sum(Box.number_of_items).alias("number_of_items"),
+                fn.Count(Box.id).alias("number_of_boxes"),
+            )
+            .join(Location)
+            .join(Base)
+            .where((Base.organisation == organisation_id) & (in_stock_location()))
+            .get()
         )
-        .get()
-    )
     return {n: getattr(overview, n) for n in ["number_of_boxes", "number_of_items"]}
 
 
-def compute_moved_stock_overview(*, organisation_id, after, before):
-    """Construct filter for date range, if at least one of `after` or `before` is given.
-    Compute number of boxes, and contained items, moved by `organisation_id` that were
-    served in that date range (default to all time). Group by ProductCategory.
+def _moved_boxes(*columns, organisation_id, after, before):
+    """Return query selecting given columns of the boxes moved by `organisation_id`
+    in the date range given by `after` and `before`.
     """
     date_filter = _build_range_filter(Box.last_modified_on, low=after, high=before)
-
-    boxes = (
-        Box.select(
-            ProductCategory.name,
-            fn.sum(Box.number_of_items).alias("number_of_items"),
-            fn.Count(Box.id).alias("number_of_boxes"),
-        )
+    return (
+        Box.select(*columns)
         .join(Location)
         .join(Base)
         .switch(Box)
@@ -141,9 +277,23 @@ def compute_moved_stock_overview(*, organisation_id, after, before):
             & (Location.is_lost != 1)
             & (Location.is_scrap != 1)
         )
-        .group_by(ProductCategory.name)
     )
 
+
+def compute_moved_stock_overview(*, organisation_id, after, before):
+    """Construct filter for date range, if at least one of `after` or `before` is given.
+    Compute number of boxes, and contained items, moved by `organisation_id` that were
+    served in that date range (default to all time). Group by ProductCategory.
+    """
+    boxes = _moved_boxes(
+        ProductCategory.name,
+        fn.sum(Box.number_of_items).alias("number_of_items"),
+        fn.Count(Box.id).alias("number_of_boxes"),
+        organisation_id=organisation_id,
+        after=after,
+        before=before,
+    ).group_by(ProductCategory.name)
+
     overview = []
     for box in boxes:
         overview.append(
@@ -154,3 +304,95 @@ def compute_moved_stock_overview(*, organisation_id, after, before):
             }
         )
     return overview
+
+
+def _bucket(field, interval):
+    """Return expression for the first day of the time interval (a `TimeseriesInterval`)
+    that the value of the given date or datetime field falls into. Weeks start on
+    Monday.
+    """
+    if interval == TimeseriesInterval.Day:
+        bucket = fn.DATE(field)
+    elif interval == TimeseriesInterval.Week:
+        bucket = fn.SUBDATE(fn.DATE(field), fn.WEEKDAY(field))
+    else:
+        bucket = fn.DATE(fn.DATE_FORMAT(field, "%Y-%m-01"))
+    return bucket.python_value(DateField().python_value)
+
+
+def compute_sales_timeseries(*, organisation_id, after, before, interval, watermark):
+    """Compute the number of sales performed by `organisation_id` in the date range
+    given by `after` and `before` (cf. `compute_sales_metrics`) per time interval.
+    The sales of each interval are summed up in a single grouped query, taking daily
+    rollups up to the given watermark into account. Return a list of dictionaries with
+    the first day of the interval and the number of sales, sorted by date.
+    """
+    date_filter = _build_range_filter(Transaction.created_on, low=after, high=before)
+    days = rolled_up_days(after=after, before=before, watermark=watermark)
+
+    bucket = _bucket(Transaction.created_on, interval)
+    sales = (
+        Transaction.select(
+            bucket.alias("date"), fn.SUM(Transaction.count).alias("number_of_sales")
+        )
+        .join(Beneficiary)
+        .join(Base)
+        .where(
+            (date_filter)
+            & (not_in_days(Transaction.created_on, days))
+            & (Base.organisation == organisation_id)
+            & (Transaction.tokens >= 0)
+        )
+        .group_by(bucket)
+    )
+    if days is not None:
+        rolled_up_bucket = _bucket(DailySales.date, interval)
+        sales += (
+            DailySales.select(
+                rolled_up_bucket.alias("date"),
+                fn.SUM(DailySales.number_of_sales).alias("number_of_sales"),
+            )
+            .join(Base)
+            .where(
+                (in_days(DailySales.date, days))
+                & (Base.organisation == organisation_id)
+            )
+            .group_by(rolled_up_bucket)
+        )
+
+    sales = sales.alias("sales")
+    timeseries = (
+        Select(
+            (sales,),
+            (sales.c.date, fn.SUM(sales.c.number_of_sales).alias("number_of_sales")),
+        )
+        .group_by(sales.c.date)
+        .order_by(sales.c.date)
+        .bind(db.database)
+        .dicts()
+    )
+    # Unlike for model queries, peewee does not convert the selected values
+    to_date = DateField().python_value
+    return [{**entry, "date": to_date(entry["date"])} for entry in timeseries]
+
+
+def compute_moved_stock_timeseries(*, organisation_id, after, before, interval):
+    """Like `compute_moved_stock_overview` but group by time interval and product
+    category in a single query. Return a list of dictionaries sorted by date and
+    product category name.
+    """
+    bucket = _bucket(Box.last_modified_on, interval)
+    return list(
+        _moved_boxes(
+            bucket.alias("date"),
+            ProductCategory.name.alias("product_category_name"),
+            fn.sum(Box.number_of_items).alias("number_of_items"),
+            fn.Count(Box.id).alias("number_of_boxes"),
+            organisation_id=organisation_id,
+            after=after,
+            before=before,
+        )
+        .group_by(bucket, ProductCategory.name)
+        .order_by(bucket, ProductCategory.name)
+        .dicts()
+    )
@@ -2,35 +2,44 @@ from ariadne import ObjectType
 
 from .crud import (
     compute_moved_stock_overview,
-    compute_number_of_beneficiaries_served,
-    compute_number_of_families_served,
-    compute_number_of_sales,
+    compute_moved_stock_timeseries,
+    compute_sales_timeseries,
     compute_stock_overview,
 )
+from .rollups import get_watermark
 
 metrics = ObjectType("Metrics")
 
 
+# Sales-related metrics are computed by a DataLoader such that all fields requested for
+# the same date range are computed together
 @metrics.field("numberOfFamiliesServed")
-def resolve_metrics_number_of_families_served(metrics_obj, _, after=None, before=None):
-    return compute_number_of_families_served(
-        organisation_id=metrics_obj["organisation_id"], after=after, before=before
+async def resolve_metrics_number_of_families_served(
+    metrics_obj, info, after=None, before=None
+):
+    return await info.context["metrics_loader"].load(
+        (metrics_obj["organisation_id"], "number_of_families_served", after, before)
     )
 
 
 @metrics.field("numberOfBeneficiariesServed")
-def resolve_metrics_number_of_beneficiaries_served(
-    metrics_obj, _, after=None, before=None
+async def resolve_metrics_number_of_beneficiaries_served(
+    metrics_obj, info, after=None, before=None
 ):
-    return compute_number_of_beneficiaries_served(
-        organisation_id=metrics_obj["organisation_id"], after=after, before=before
+    return await info.context["metrics_loader"].load(
+        (
+            metrics_obj["organisation_id"],
+            "number_of_beneficiaries_served",
+            after,
+            before,
+        )
     )
 
 
 @metrics.field("numberOfSales")
-def resolve_metrics_number_of_sales(metrics_obj, _, after=None, before=None):
-    return compute_number_of_sales(
-        organisation_id=metrics_obj["organisation_id"], after=after, before=before
+async def resolve_metrics_number_of_sales(metrics_obj, info, after=None, before=None):
+    return await info.context["metrics_loader"].load(
+        (metrics_obj["organisation_id"], "number_of_sales", after, before)
     )
 
 
@@ -44,3 +53,26 @@ def resolve_metrics_moved_stock_overview(metrics_obj, _, after=None, before=None
     return compute_moved_stock_overview(
         organisation_id=metrics_obj["organisation_id"], after=after, before=before
     )
+
+
+@metrics.field("salesTimeseries")
+def resolve_metrics_sales_timeseries(metrics_obj, _, interval, after=None, before=None):
+    return compute_sales_timeseries(
+        organisation_id=metrics_obj["organisation_id"],
+        after=after,
+        before=before,
+        interval=interval,
+        watermark=get_watermark(),
+    )
+
+
+@metrics.field("movedStockTimeseries")
+def resolve_metrics_moved_stock_timeseries(
+    metrics_obj, _, interval, after=None, before=None
+):
+    return compute_moved_stock_timeseries(
+        organisation_id=metrics_obj["organisation_id"],
+        after=after,
+        before=before,
+        interval=interval,
+    )
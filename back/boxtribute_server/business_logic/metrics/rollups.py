@@ -0,0 +1,143 @@
+"""Pre-aggregated metrics (rollups).
+
+Transactions are aggregated per day into the tables of the `DailySales` (number of sales
+per base and product category) and `DailyServedBeneficiary` models. The watermark is
+the first day that has not been aggregated yet. Only complete days (i.e. before the
+current day) are aggregated. A refresh processes the transactions from the watermark
+up to the current day, and advances the watermark.
+Transactions are assumed to be recorded at the time of the sale and never modified (as
+done by dropapp), hence days before the watermark do not have to be updated.
+
+Metrics for a date range are computed by summing the rollups of all days that lie
+entirely within the range and before the watermark, and by querying the transactions
+for the remainder of the range (e.g. the current day).
+"""
+from datetime import timedelta
+
+from peewee import JOIN, IntegrityError, fn
+
+from ...db import db
+from ...models.definitions.beneficiary import Beneficiary
+from ...models.definitions.daily_sales import DailySales
+from ...models.definitions.daily_served_beneficiary import DailyServedBeneficiary
+from ...models.definitions.metrics_watermark import MetricsWatermark
+from ...models.definitions.product import Product
+from ...models.definitions.transaction import Transaction
+from ...models.utils import utcnow
+
+TRANSACTIONS_WATERMARK = "transactions"
+
+
+def get_watermark(name=TRANSACTIONS_WATERMARK):
+    """Return the first day that has not been aggregated yet, or None if no data has
+    been aggregated.
+    """
+    watermark = MetricsWatermark.get_or_none(MetricsWatermark.name == name)
+    return None if watermark is None else watermark.rolled_up_until
+
+
+def rolled_up_days(*, after, before, watermark):
+    """Return the range of days `(start, end)` (start incl., end excl.) whose data is
+    fully selected by the date range filter for `after` and `before` (see
+    `crud._build_range_filter`), and that have been aggregated according to the
+    watermark. `start` is None if the range begins with the earliest data. Return None
+    if no such day exists.
+    """
+    if watermark is None:
+        return None
+
+    start = after
+    if after and not before:
+        # The filter excludes the very beginning of the day of `after`
+        start = after + timedelta(days=1)
+    end = min(before, watermark) if before else watermark
+    if start and start >= end:
+        return None
+    return start, end
+
+
+def in_days(field, days):
+    """Return condition selecting values of the given date or datetime field that lie in
+    the given range of days.
+    """
+    start, end = days
+    condition = field < end
+    if start:
+        condition &= field >= start
+    return condition
+
+
+def not_in_days(field, days):
+    """Return condition selecting values of the given field that do not lie in the
+    given range of days (if any; otherwise return True for non-effective filtering).
+    """
+    if days is None:
+        return True
+    return ~in_days(field, days)
+
+
+def refresh_rollups(*, until=None):
+    """Aggregate the transactions of all days from the watermark up to `until` (excl.;
+    default: current day in UTC) into the rollup tables, and advance the watermark.
+    Return the new watermark, or None if there was nothing to aggregate.
+    If another refresh advanced the watermark concurrently, nothing is aggregated.
+    """
+    until = until or utcnow().date()
+    with db.database.atomic():
+        watermark = get_watermark()
+        if watermark is None:
+            try:
+                MetricsWatermark.create(
+                    name=TRANSACTIONS_WATERMARK, rolled_up_until=until
+                )
+            except IntegrityError:
+                return None
+        elif watermark >= until:
+            return None
+        elif not (
+            MetricsWatermark.update(rolled_up_until=until)
+            .where(
+                (MetricsWatermark.name == TRANSACTIONS_WATERMARK)
+                & (MetricsWatermark.rolled_up_until == watermark)
+            )
+            .execute()
+        ):
+            return None
+
+        days = (watermark, until)
+        day = fn.DATE(Transaction.created_on)
+        sales = (
+            Transaction.select(
+                day, Beneficiary.base, Product.category, fn.SUM(Transaction.count)
+            )
+            .join(Beneficiary)
+            .switch(Transaction)
+            .join(Product, JOIN.LEFT_OUTER)
+            .where((in_days(Transaction.created_on, days)) & (Transaction.tokens >= 0))
+            .group_by(day, Beneficiary.base, Product.category)
+        )
+        DailySales.insert_from(
+            sales,
+            [
+                DailySales.date,
+                DailySales.base,
+                DailySales.product_category,
+                DailySales.number_of_sales,
+            ],
+        ).execute()
+
+        served_beneficiaries = (
+            Transaction.select(day, Transaction.beneficiary)
+            .where(
+                (in_days(Transaction.created_on, days))
+                & (Transaction.beneficiary.is_null(False))
+                & (Transaction.count > 0)
+                & (Transaction.tokens >= 0)
+            )
+            .distinct()
+        )
+        DailyServedBeneficiary.insert_from(
+            served_beneficiaries,
+            [DailyServedBeneficiary.date, DailyServedBeneficiary.beneficiary],
+        ).execute()
+    return until
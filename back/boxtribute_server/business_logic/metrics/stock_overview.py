@@ -0,0 +1,159 @@
+"""Maintained stock overview.
+
+The number of boxes, and of contained items, in the stock locations (i.e. visible, and
+not marked as lost, scrap, or donated) is counted per base and location type in the
+table of the `StockOverviewCounter` model. The counters are updated in the same
+transaction as the box mutations that move boxes between locations or change their
+number of items (see `update_stock_overview`). Hence the stock overview of an
+organisation is read from as many rows as it has bases.
+
+Changes of boxes or locations that are made outside of the app (e.g. by dropapp) are
+not tracked. The resulting drift is detected and repaired by `reconcile_stock_overview`,
+which is intended to be run periodically. The counters are only used once they have
+been reconciled (the day of the last reconciliation is stored as watermark); until
+then the stock overview is computed from the boxes table.
+"""
+from collections import defaultdict
+
+from peewee import fn
+
+from ...db import db
+from ...models.definitions.box import Box
+from ...models.definitions.location import Location
+from ...models.definitions.metrics_watermark import MetricsWatermark
+from ...models.definitions.stock_overview_counter import StockOverviewCounter
+from ...models.utils import utcnow
+
+STOCK_OVERVIEW_WATERMARK = "stock_overview"
+
+
+def in_stock_location():
+    """Return condition selecting locations whose boxes are part of the stock."""
+    return (
+        (Location.visible == 1)
+        & (Location.is_lost != 1)
+        & (Location.is_scrap != 1)
+        & (Location.is_donated != 1)
+    )
+
+
+def update_stock_overview(*, removed=(), added=()):
+    """Update the stock overview counters for boxes that were removed from and added to
+    locations, given as iterables of tuples of location ID and number of items in the
+    box. A change of the number of items in a box is passed as removing the box with
+    the old number, and adding it with the new number.
+    Must be called in the transaction that modifies the boxes. No query is executed if
+    the changes cancel out.
+    """
+    # Changes of number of boxes and number of items per location
+    changes = defaultdict(lambda: [0, 0])
+    for sign, boxes in [(-1, removed), (1, added)]:
+        for location_id, number_of_items in boxes:
+            change = changes[location_id]
+            change[0] += sign
+            change[1] += sign * (number_of_items or 0)
+    changes = {i: c for i, c in changes.items() if c != [0, 0]}
+    if not changes:
+        return
+
+    counter_changes = defaultdict(lambda: [0, 0])
+    for location in Location.select(Location.id, Location.base, Location.type).where(
+        (Location.id << list(changes)) & (in_stock_location())
+    ):
+        counter_change = counter_changes[(location.base_id, location.type)]
+        counter_change[0] += changes[location.id][0]
+        counter_change[1] += changes[location.id][1]
+
+    # Sort rows to update counters in a consistent order across transactions
+    rows = [
+        {
+            "base": base_id,
+            "location_type": location_type,
+            "number_of_boxes": number_of_boxes,
+            "number_of_items": number_of_items,
+        }
+        for (base_id, location_type), (number_of_boxes, number_of_items) in sorted(
+            counter_changes.items(), key=lambda c: (c[0][0], c[0][1].name)
+        )
+        if number_of_boxes or number_of_items
+    ]
+    if rows:
+        StockOverviewCounter.insert_many(rows).on_conflict(
+            update={
+                StockOverviewCounter.number_of_boxes: (
+                    StockOverviewCounter.number_of_boxes
+                    + fn.VALUES(StockOverviewCounter.number_of_boxes)
+                ),
+                StockOverviewCounter.number_of_items: (
+                    StockOverviewCounter.number_of_items
+                    + fn.VALUES(StockOverviewCounter.number_of_items)
+                ),
+            }
+        ).execute()
+
+
+def reconcile_stock_overview(*, repair=True):
+    """Compare the stock overview counters with the numbers computed from the boxes
+    table. Return the drifted counters as list of dictionaries with base ID, location
+    type, and counted and actual numbers of boxes and items, sorted by base ID.
+    If `repair` is set, overwrite drifted counters with the actual numbers, and set the
+    watermark such that the counters are used from now on.
+    """
+    with db.database.atomic():
+        # Lock the counters such that concurrent box mutations wait for the
+        # reconciliation to complete
+        counted = {
+            (c.base_id, c.location_type): (c.number_of_boxes, c.number_of_items)
+            for c in StockOverviewCounter.select().for_update()
+        }
+        actual = {
+            (row.location.base_id, row.location.type): (
+                row.number_of_boxes,
+                row.number_of_items,
+            )
+            for row in Box.select(
+                Location.base,
+                Location.type,
+                fn.COUNT(Box.id).alias("number_of_boxes"),
+                fn.COALESCE(fn.SUM(Box.number_of_items), 0).alias("number_of_items"),
+            )
+            .join(Location)
+            .where(in_stock_location())
+            .group_by(Location.base, Location.type)
+        }
+
+        drift = []
+        for base_id, location_type in sorted(
+            counted.keys() | actual.keys(), key=lambda k: (k[0], k[1].name)
+        ):
+            counted_numbers = counted.get((base_id, location_type), (0, 0))
+            actual_numbers = actual.get((base_id, location_type), (0, 0))
+            if counted_numbers != actual_numbers:
+                drift.append(
+                    {
+                        "base_id": base_id,
+                        "location_type": location_type,
+                        "counted_number_of_boxes": counted_numbers[0],
+                        "counted_number_of_items": counted_numbers[1],
+                        "number_of_boxes": actual_numbers[0],
+                        "number_of_items": actual_numbers[1],
+                    }
+                )
+
+        if repair:
+            if drift:
+                StockOverviewCounter.replace_many(
+                    [
+                        {
+                            "base": d["base_id"],
+                            "location_type": d["location_type"],
+                            "number_of_boxes": d["number_of_boxes"],
+                            "number_of_items": d["number_of_items"],
+                        }
+                        for d in drift
+                    ]
+                ).execute()
+            MetricsWatermark.replace(
+                name=STOCK_OVERVIEW_WATERMARK, rolled_up_until=utcnow().date()
+            ).execute()
+    return drift
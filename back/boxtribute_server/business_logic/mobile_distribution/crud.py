@@ -29,6 +29,7 @@ from ...models.definitions.size import Size
 from ...models.definitions.size_range import SizeRange
 from ...models.definitions.unboxed_items_collection import UnboxedItemsCollection
 from ...models.utils import utcnow
+from ..metrics.stock_overview import update_stock_overview
 
 
 def move_items_from_box_to_distribution_event(
@@ -47,7 +48,13 @@ def move_items_from_box_to_distribution_event(
                 distribution_event_id=distribution_event.id,
             )
 
-        box = Box.get(Box.label_identifier == box_label_identifier)
+        # Lock the box until the stock overview counters are updated
+        box = (
+            Box.select()
+            .where(Box.label_identifier == box_label_identifier)
+            .for_update()
+            .get()
+        )
 
         if box.number_of_items < number_of_items:
             raise NotEnoughItemsInBox(
@@ -64,10 +71,15 @@ def move_items_from_box_to_distribution_event(
         )
 
         unboxed_items_collection.number_of_items += number_of_items
+        old_number_of_items = box.number_of_items
         box.number_of_items -= number_of_items
 
         unboxed_items_collection.save()
         box.save()
+        update_stock_overview(
+            removed=[(box.location_id, old_number_of_items)],
+            added=[(box.location_id, box.number_of_items)],
+        )
         return unboxed_items_collection
 
 
@@ -383,7 +395,12 @@ def start_distribution_events_tracking_group(
         # * for all UnboxedItemCollections AND Boxes
         product_size_tuples_to_number_of_items_counter = Counter()
 
-        boxes = Box.select().where(Box.distribution_event << distribution_event_ids)
+        boxes = list(
+            Box.select()
+            .where(Box.distribution_event << distribution_event_ids)
+            .for_update()
+        )
+        removed_boxes = [(box.location_id, box.number_of_items) for box in boxes]
         unboxed_items_collections = UnboxedItemsCollection.select().where(
             UnboxedItemsCollection.distribution_event << distribution_event_ids
         )
@@ -408,6 +425,11 @@ def start_distribution_events_tracking_group(
             # TODO: set all UnboxedItemsCollection to correct state (?)
             box.save()
 
+        update_stock_overview(
+            removed=removed_boxes,
+            added=[(box.location_id, box.number_of_items) for box in boxes],
+        )
+
         for unboxed_items_collection in unboxed_items_collections:
             product_size_tuple = (
                 unboxed_items_collection.product_id,
@@ -499,9 +521,20 @@ def move_items_from_return_tracking_group_to_box(
             size_id=size_id,
             number_of_items=number_of_items,
         )
-        target_box = Box.get(Box.label_identifier == target_box_label_identifier)
+        # Lock the box until the stock overview counters are updated
+        target_box = (
+            Box.select()
+            .where(Box.label_identifier == target_box_label_identifier)
+            .for_update()
+            .get()
+        )
+        old_number_of_items = target_box.number_of_items
         target_box.number_of_items += number_of_items
         target_box.save()
+        update_stock_overview(
+            removed=[(target_box.location_id, old_number_of_items)],
+            added=[(target_box.location_id, target_box.number_of_items)],
+        )
         return log_entry
 
 
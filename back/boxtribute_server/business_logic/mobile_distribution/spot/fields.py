@@ -15,6 +15,6 @@ def resolve_distribution_spot_distribution_events(spot_obj, _):
 
 
 @distribution_spot.field("base")
-def resolve_resource_base(spot_obj, _):
+def resolve_resource_base(spot_obj, info):
     authorize(permission="base:read", base_id=spot_obj.base_id)
-    return spot_obj.base
+    return info.context["base_loader"].load(spot_obj.base_id)
@@ -16,7 +16,9 @@ from ....models.definitions.product import Product
 from ....models.definitions.qr_code import QrCode
 from ....models.definitions.size import Size
 from ....models.definitions.tags_relation import TagsRelation
+from ....models.definitions.user import User
 from ....models.utils import save_creation_to_history, save_update_to_history, utcnow
+from ...metrics.stock_overview import update_stock_overview
 from ...tag.crud import assign_tag, unassign_tag
 
 BOX_LABEL_IDENTIFIER_GENERATION_ATTEMPTS = 10
@@ -69,6 +71,7 @@ def create_box(
 
             with db.database.atomic():
                 new_box.save()
+                update_stock_overview(added=[(location_id, number_of_items)])
                 for tag_id in tag_ids or []:
                     assign_tag(
                         user_id=user_id,
@@ -171,58 +174,99 @@ def update_box(
 
     box.last_modified_by = user_id
     box.last_modified_on = utcnow()
-    box.save()
+    with db.database.atomic():
+        # Read the stored values for updating the stock overview counters, and lock the
+        # box until the counters are updated (the box might have been modified by a
+        # concurrent request since it was retrieved above)
+        stored_box = (
+            Box.select(Box.location, Box.number_of_items)
+            .where(Box.id == box.id)
+            .for_update()
+            .get()
+        )
+        box.save()
+        update_stock_overview(
+            removed=[(stored_box.location_id, stored_box.number_of_items)],
+            added=[(box.location_id, box.number_of_items)],
+        )
     return box
 
 
-def get_box_history(box_id):
-    """Return formatted history entries of box with given ID, sorted by most recent
-    first.
+# Names of history entry columns holding IDs of referenced resources, mapped to the
+# resource model, the model field describing the resource, and the description of the
+# change
+_HISTORY_REFERENCES = {
+    "product_id": (Product, Product.name, "changed product type"),
+    "location_id": (Location, Location.name, "changed box location"),
+    "size_id": (Size, Size.label, "changed size"),
+}
+
+
+def get_box_histories(box_ids):
+    """Return formatted history entries of boxes with given IDs, as a mapping of box ID
+    to list of entries sorted by most recent first. Boxes without history are mapped to
+    an empty list.
+    The entries are fetched in a single query, sorted by the database. All resources
+    referenced by the entries (products, locations, sizes) are fetched with one query
+    per model.
     """
-    entries = []
-    for raw_entry in DbChangeHistory.select().where(
-        DbChangeHistory.table_name == "stock",
-        DbChangeHistory.record_id == box_id,
-    ):
-        changes = raw_entry.changes
-        if changes == "items":
-            changes = (
-                f"changed the number of items from {raw_entry.from_int} to "
-                + f"{raw_entry.to_int}"
-            )
+    raw_entries = list(
+        DbChangeHistory.select(DbChangeHistory, User)
+        .join(User, peewee.JOIN.LEFT_OUTER)
+        .where(
+            DbChangeHistory.table_name == "stock",
+            DbChangeHistory.record_id << box_ids,
+        )
+        # Matches the (table_name, record_id, change_date) index
+        .order_by(DbChangeHistory.change_date.desc(), DbChangeHistory.id.desc())
+    )
 
-        elif changes == "product_id":
-            old_product = Product.get_by_id(raw_entry.from_int)
-            new_product = Product.get_by_id(raw_entry.to_int)
-            changes = (
-                f"changed product type from {old_product.name} to "
-                + f"{new_product.name}"
+    referenced_ids = {changes: set() for changes in _HISTORY_REFERENCES}
+    for raw_entry in raw_entries:
+        if raw_entry.changes in referenced_ids:
+            referenced_ids[raw_entry.changes].update(
+                [raw_entry.from_int, raw_entry.to_int]
             )
 
-        elif changes == "location_id":
-            old_location = Location.get_by_id(raw_entry.from_int)
-            new_location = Location.get_by_id(raw_entry.to_int)
-            changes = (
-                f"changed box location from {old_location.name} to "
-                + f"{new_location.name}"
-            )
+    # Mapping of column name to mapping of resource ID to resource description
+    descriptions = {}
+    for changes, (model, field, _) in _HISTORY_REFERENCES.items():
+        ids = referenced_ids[changes]
+        descriptions[changes] = {}
+        if ids:
+            for resource in model.select(model.id, field).where(model.id << ids):
+                descriptions[changes][resource.id] = getattr(resource, field.name)
+
+    entries = {box_id: [] for box_id in box_ids}
+    for raw_entry in raw_entries:
+        raw_entry.changes = _format_history_changes(raw_entry, descriptions)
+        entries[raw_entry.record_id].append(raw_entry)
+    return entries
+
+
+def _format_history_changes(raw_entry, descriptions):
+    changes = raw_entry.changes
+    if changes == "items":
+        return (
+            f"changed the number of items from {raw_entry.from_int} to "
+            + f"{raw_entry.to_int}"
+        )
 
-        elif changes == "size_id":
-            old_size = Size.get_by_id(raw_entry.from_int)
-            new_size = Size.get_by_id(raw_entry.to_int)
-            changes = f"changed size from {old_size.label} to {new_size.label}"
+    if changes in _HISTORY_REFERENCES:
+        description = _HISTORY_REFERENCES[changes][2]
+        old = descriptions[changes].get(raw_entry.from_int)
+        new = descriptions[changes].get(raw_entry.to_int)
+        return f"{description} from {old} to {new}"
 
-        elif changes == "box_state_id":
-            old_state = BoxState(raw_entry.from_int)
-            new_state = BoxState(raw_entry.to_int)
-            changes = f"changed box state from {old_state.name} to {new_state.name}"
+    if changes == "box_state_id":
+        old_state = BoxState(raw_entry.from_int)
+        new_state = BoxState(raw_entry.to_int)
+        return f"changed box state from {old_state.name} to {new_state.name}"
 
-        elif changes.startswith("comments"):
-            changes = changes.replace("comments changed", "changed comments")
+    if changes.startswith("comments"):
+        return changes.replace("comments changed", "changed comments")
 
-        elif changes.startswith("Record"):
-            changes = changes.replace("Record created", "created record")
+    if changes.startswith("Record"):
+        return changes.replace("Record created", "created record")
 
-        raw_entry.changes = changes
-        entries.append(raw_entry)
-    return sorted(entries, key=lambda e: e.id, reverse=True)
+    return changes
@@ -1,8 +1,7 @@
 from ariadne import ObjectType
 
 from ....authz import authorize
-from ....models.definitions.shipment_detail import ShipmentDetail
-from .crud import get_box_history
+from ....enums import TaggableObjectType
 
 box = ObjectType("Box")
 unboxed_items_collection = ObjectType("UnboxedItemsCollection")
@@ -16,13 +15,15 @@ def resolve_box_qr_code(box_obj, _):
 
 @box.field("tags")
 def resolve_box_tags(box_obj, info):
-    return info.context["tags_for_box_loader"].load(box_obj.id)
+    return info.context["tags_for_resource_loader"].load(
+        (TaggableObjectType.Box, box_obj.id)
+    )
 
 
 @box.field("history")
-def resolve_box_history(box_obj, _):
+def resolve_box_history(box_obj, info):
     authorize(permission="history:read")
-    return get_box_history(box_obj.id)
+    return info.context["history_for_box_loader"].load(box_obj.id)
 
 
 @box.field("product")
@@ -48,15 +49,6 @@ def resolve_box_state(box_obj, _):
 
 
 @box.field("shipmentDetail")
-def resolve_box_shipment_detail(box_obj, _):
+def resolve_box_shipment_detail(box_obj, info):
     authorize(permission="shipment_detail:read")
-    return (
-        ShipmentDetail.select()
-        .where(
-            ShipmentDetail.box == box_obj.id,
-            ShipmentDetail.removed_on.is_null(),
-            ShipmentDetail.lost_on.is_null(),
-            ShipmentDetail.received_on.is_null(),
-        )
-        .get_or_none()
-    )
+    return info.context["shipment_detail_for_box_loader"].load(box_obj.id)
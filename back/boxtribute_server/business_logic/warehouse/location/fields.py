@@ -16,7 +16,9 @@ def resolve_location_default_box_state(location_obj, _):
 
 
 @classic_location.field("boxes")
-def resolve_location_boxes(location_obj, _, pagination_input=None, filter_input=None):
+def resolve_location_boxes(
+    location_obj, _, pagination_input=None, filter_input=None, sort_input=None
+):
     authorize(permission="stock:read", base_id=location_obj.base_id)
     location_filter_condition = Box.location == location_obj.id
     filter_condition = location_filter_condition & derive_box_filter(filter_input)
@@ -26,11 +28,15 @@ def resolve_location_boxes(location_obj, _, pagination_input=None, filter_input=
     ):
         selection = Box.select().join(Product)
     return load_into_page(
-        Box, filter_condition, selection=selection, pagination_input=pagination_input
+        Box,
+        filter_condition,
+        selection=selection,
+        pagination_input=pagination_input,
+        sort_input=sort_input,
     )
 
 
 @classic_location.field("base")
-def resolve_location_base(location_obj, _):
+def resolve_location_base(location_obj, info):
     authorize(permission="base:read", base_id=location_obj.base_id)
-    return location_obj.base
+    return info.context["base_loader"].load(location_obj.base_id)
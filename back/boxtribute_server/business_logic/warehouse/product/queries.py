@@ -8,11 +8,12 @@ query = QueryType()
 
 
 @query.field("products")
-def resolve_products(*_, pagination_input=None):
+def resolve_products(*_, pagination_input=None, sort_input=None):
     return load_into_page(
         Product,
         authorized_bases_filter(Product),
         pagination_input=pagination_input,
+        sort_input=sort_input,
     )
 
 
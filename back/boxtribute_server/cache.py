@@ -0,0 +1,68 @@
+"""In-process caches with usage statistics"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Statistics about cache usage (similar to `functools.lru_cache`). `refreshes` counts
+# entries that were fetched again although present, for caches that support it
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize", "refreshes"], defaults=[0]
+)
+
+
+class LRUCache:
+    """Thread-safe mapping holding at most `maxsize` entries. When the cache is full,
+    the least recently used entry is evicted on insertion.
+    Entries can be given an expiry timestamp (seconds since epoch). Expired entries are
+    treated as absent and removed on access.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # Mapping of key to tuple of value and expiry timestamp
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires_at = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+
+            if expires_at is not None and time.time() >= expires_at:
+                del self._entries[key]
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value, *, expires_at=None):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def cache_info(self):
+        """Return statistics about cache usage (similar to `functools.lru_cache`)."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,13 +1,22 @@
 from peewee import MySQLDatabase
 from playhouse.flask_utils import FlaskDB  # type: ignore
 
+from .instrumentation import InstrumentedDatabaseMixin
+
 db = FlaskDB()
 
 
+class InstrumentedMySQLDatabase(InstrumentedDatabaseMixin, MySQLDatabase):
+    """MySQL database interface that reports executed statements for per-request
+    statistics (see `instrumentation.py`).
+    """
+
+
 def create_db_interface(**mysql_kwargs):
     """Create MySQL database interface using given connection parameters. `mysql_kwargs`
     are validated to not be None and forwarded to `pymysql.connect`.
-    Configure primary keys to be unsigned integer.
+    Configure primary keys to be unsigned integer. Executed SQL statements are
+    instrumented.
     """
     for field in ["host", "port", "user", "password", "database"]:
         if mysql_kwargs.get(field) is None:
@@ -15,6 +24,6 @@ def create_db_interface(**mysql_kwargs):
                 f"Field '{field}' for database configuration must not be None"
             )
 
-    return MySQLDatabase(
+    return InstrumentedMySQLDatabase(
         **mysql_kwargs, field_types={"AUTO": "INTEGER UNSIGNED AUTO_INCREMENT"}
     )
@@ -112,3 +112,38 @@ class TagType(enum.Enum):
 class TaggableObjectType(enum.Enum):
     Box = "Stock"
     Beneficiary = "People"
+
+
+class BeneficiarySearchMode(enum.Enum):
+    Substring = "substring"
+    Prefix = "prefix"
+    FullText = "fulltext"
+
+
+class TimeseriesInterval(enum.Enum):
+    Day = "day"
+    Week = "week"
+    Month = "month"
+
+
+class SortDirection(enum.Enum):
+    Ascending = "asc"
+    Descending = "desc"
+
+
+# Fields that pages of resources can be sorted by. The values are the names of the
+# respective model fields
+class BoxSortField(enum.Enum):
+    lastModifiedOn = "last_modified_on"
+    createdOn = "created_on"
+
+
+class BeneficiarySortField(enum.Enum):
+    lastName = "last_name"
+    firstName = "first_name"
+    createdOn = "created_on"
+
+
+class ProductSortField(enum.Enum):
+    name = "name"
+    createdOn = "created_on"
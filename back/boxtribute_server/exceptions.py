@@ -1,3 +1,5 @@
+from typing import Dict
+
 import peewee
 
 from .utils import in_development_environment
@@ -183,10 +185,12 @@ class ModifyCompletedDistributionEvent(Exception):
 
 
 class InvalidPaginationInput(Exception):
-    extensions = {
-        "code": "BAD_USER_INPUT",
-        "description": "Invalid pagination input: missing 'before' field.",
-    }
+    def __init__(self, *args, reason="missing 'before' field", **kwargs):
+        self.extensions = {
+            "code": "BAD_USER_INPUT",
+            "description": f"Invalid pagination input: {reason}.",
+        }
+        super().__init__(*args, **kwargs)
 
 
 class IncompatibleTagTypeAndResourceType(Exception):
@@ -204,3 +208,44 @@ class NegativeNumberOfItems(Exception):
         "code": "BAD_USER_INPUT",
         "description": "Invalid input: negative value for 'numberOfItems'",
     }
+
+
+class PersistedQueryError(Exception):
+    """Base class for errors of automatic persisted queries (see
+    graph_ql/persisted_queries.py). They are raised before GraphQL execution, and
+    converted into a response holding an `errors` field by the route handlers.
+    """
+
+    message: str
+    status_code: int
+    extensions: Dict[str, str]
+
+
+class PersistedQueryNotFound(PersistedQueryError):
+    # This message is expected by Apollo clients
+    message = "PersistedQueryNotFound"
+    status_code = 200
+    extensions = {
+        "code": "PERSISTED_QUERY_NOT_FOUND",
+        "description": "The persisted query is unknown. Please send the full query.",
+    }
+
+
+class InvalidPersistedQuery(PersistedQueryError):
+    message = "invalid persisted query"
+    status_code = 400
+    extensions = {
+        "code": "BAD_USER_INPUT",
+        "description": "The SHA-256 hash and the query of a persisted query must be "
+        "strings.",
+    }
+
+
+class PersistedQueryHashMismatch(PersistedQueryError):
+    message = "provided sha does not match query"
+    status_code = 400
+    extensions = {
+        "code": "BAD_USER_INPUT",
+        "description": "The SHA-256 hash of the persisted query does not match the "
+        "query.",
+    }
@@ -0,0 +1,158 @@
+"""Static cost analysis of GraphQL queries.
+
+Before a query is executed, its cost is estimated from the query document, taking
+variables into account. The cost is a measure for the number of rows that are fetched
+from the database:
+- every field of object type costs 1 (fields of scalar or enum type are free), unless
+  a different cost is specified in `FIELD_COSTS`
+- the cost of a list field is multiplied by the number of expected elements. For
+  paginated fields (taking a `paginationInput` argument) this is the requested page
+  size, i.e. the value of `first`/`last` (default: 50); for all other list fields it is
+  `DEFAULT_LIST_SIZE`
+- the cost of the sub-selection of a field is added to the field's cost
+
+Example:
+    query { base(id: 1) { locations { boxes(paginationInput: {first: 20}) {
+        elements { product { name } } } } } }
+has a cost of 1 * (1 + 10 * (1 + 1 * (1 + 20 * (1 + 1)))) = 421.
+"""
+import os
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    get_named_type,
+    get_nullable_type,
+    is_leaf_type,
+    is_list_type,
+    type_from_ast,
+)
+from graphql.execution.values import get_argument_values, get_variable_values
+from graphql.utilities import get_operation_ast, get_operation_root_type
+
+from ..exceptions import InvalidPaginationInput
+from .pagination import page_size
+
+# Assumed number of elements returned by a non-paginated list field
+DEFAULT_LIST_SIZE = 10
+
+# Maximum cost of a query sent to the query-only API (can be overwritten by the
+# environment variable QUERY_API_MAX_COST)
+DEFAULT_MAX_QUERY_COST = 25_000
+
+# Costs of fields that are more expensive to resolve than a simple look-up, keyed by
+# '<type>.<field>'
+FIELD_COSTS = {
+    "BeneficiaryPage.totalCount": 1,
+    "BoxPage.totalCount": 1,
+    "ProductPage.totalCount": 1,
+    "Base.distributionEventsStatistics": 10,
+    "Metrics.numberOfFamiliesServed": 10,
+    "Metrics.numberOfBeneficiariesServed": 10,
+    "Metrics.numberOfSales": 10,
+    "Metrics.stockOverview": 10,
+    "Metrics.movedStockOverview": 10,
+    "Metrics.salesTimeseries": 10,
+    "Metrics.movedStockTimeseries": 10,
+}
+
+
+def query_api_max_cost():
+    """Return the maximum cost of a query sent to the query-only API."""
+    return int(os.getenv("QUERY_API_MAX_COST", DEFAULT_MAX_QUERY_COST))
+
+
+def calculate_query_cost(schema, document, *, variables=None, operation_name=None):
+    """Return the cost of the operation in the validated query document. If the
+    operation can't be determined, or the variables are invalid, return 0 (the errors
+    are reported during execution).
+    """
+    operation = get_operation_ast(document, operation_name)
+    if operation is None:
+        return 0
+
+    variable_values = get_variable_values(
+        schema, operation.variable_definitions or [], variables or {}
+    )
+    if isinstance(variable_values, list):
+        # List of errors
+        return 0
+
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    analyzer = _CostAnalyzer(schema, fragments, variable_values)
+    return analyzer.selection_set_cost(
+        operation.selection_set, get_operation_root_type(schema, operation)
+    )
+
+
+class _CostAnalyzer:
+    def __init__(self, schema, fragments, variable_values):
+        self.schema = schema
+        self.fragments = fragments
+        self.variable_values = variable_values
+
+    def selection_set_cost(self, selection_set, parent_type, list_size=None):
+        """Return the summed cost of all selections. If `list_size` is given, it is
+        used as multiplier for list fields (instead of `DEFAULT_LIST_SIZE`).
+        Fragments on abstract types are all accounted for, hence the cost is an upper
+        bound.
+        """
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                cost += self.field_cost(selection, parent_type, list_size)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = (
+                    parent_type
+                    if selection.type_condition is None
+                    else type_from_ast(self.schema, selection.type_condition)
+                )
+                cost += self.selection_set_cost(
+                    selection.selection_set, fragment_type, list_size
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments[selection.name.value]
+                cost += self.selection_set_cost(
+                    fragment.selection_set,
+                    type_from_ast(self.schema, fragment.type_condition),
+                    list_size,
+                )
+        return cost
+
+    def field_cost(self, node, parent_type, list_size):
+        name = node.name.value
+        if name.startswith("__"):
+            # Introspection fields
+            return 0
+
+        field = parent_type.fields[name]
+        field_type = get_named_type(field.type)
+        cost = FIELD_COSTS.get(f"{parent_type.name}.{name}")
+        if is_leaf_type(field_type):
+            return cost or 0
+
+        # Elements of paginated types (e.g. BoxPage.elements) are limited by the page
+        # size
+        child_list_size = None
+        pagination_argument = field.args.get("paginationInput")
+        if pagination_argument is not None:
+            arguments = get_argument_values(field, node, self.variable_values)
+            # Argument names are converted to snake case by Ariadne
+            pagination_input = arguments.get(pagination_argument.out_name)
+            try:
+                child_list_size = page_size(pagination_input) or 0
+            except InvalidPaginationInput:
+                # The error is reported during execution
+                child_list_size = 0
+
+        cost = 1 if cost is None else cost
+        cost += self.selection_set_cost(node.selection_set, field_type, child_list_size)
+        if is_list_type(get_nullable_type(field.type)):
+            cost *= DEFAULT_LIST_SIZE if list_size is None else list_size
+        return cost
@@ -1,6 +1,9 @@
 from ariadne import EnumType
 
 from ..enums import (
+    BeneficiarySearchMode,
+    BeneficiarySortField,
+    BoxSortField,
     BoxState,
     DistributionEventState,
     DistributionEventsTrackingGroupState,
@@ -9,9 +12,12 @@ from ..enums import (
     Language,
     PackingListEntryState,
     ProductGender,
+    ProductSortField,
     ShipmentState,
+    SortDirection,
     TaggableObjectType,
     TagType,
+    TimeseriesInterval,
     TransferAgreementState,
     TransferAgreementType,
 )
@@ -31,4 +37,10 @@ enum_types = [
     DistributionEventsTrackingGroupState,
     DistributionEventTrackingFlowDirection,
     DistributionEventTrackingFlowDirection,
+    BeneficiarySearchMode,
+    TimeseriesInterval,
+    SortDirection,
+    BoxSortField,
+    BeneficiarySortField,
+    ProductSortField,
 ]
@@ -1,51 +1,240 @@
 import asyncio
+import hashlib
+import threading
+from inspect import isawaitable
 
-from ariadne import graphql
+from ariadne.graphql import (
+    handle_graphql_errors,
+    handle_query_result,
+    validate_data,
+    validate_query,
+)
 from flask import current_app, jsonify, request
+from graphql import GraphQLError, execute, parse
 
+from ..cache import LRUCache
 from ..exceptions import format_database_errors
+from ..instrumentation import record_sql_queries, resolver_path_middleware
+from ..logging import log_sql_statistics_to_gcloud
+from ..models.definitions.base import Base
+from ..models.definitions.location import Location
+from ..models.definitions.organisation import Organisation
+from ..models.definitions.product import Product
+from ..models.definitions.shipment import Shipment
+from .cost import calculate_query_cost
 from .loaders import (
+    HistoryForBoxLoader,
+    LanguagesForBeneficiaryLoader,
     LocationLoader,
+    MetricsLoader,
+    ModelLoader,
     ProductCategoryLoader,
     ProductLoader,
+    ShipmentDetailForBoxLoader,
     SizeLoader,
     SizeRangeLoader,
     SizesForSizeRangeLoader,
-    TagsForBoxLoader,
+    TagsForResourceLoader,
+    TokensForBeneficiaryLoader,
+    TransactionsForBeneficiaryLoader,
 )
 
+# Storage for the event loop of the current worker thread
+_worker = threading.local()
+
+# Maximum number of parsed and validated query documents kept in memory
+DOCUMENT_CACHE_SIZE = 256
+document_cache = LRUCache(maxsize=DOCUMENT_CACHE_SIZE)
 
-def execute_async(*, schema, introspection=None):
-    """Create coroutine and execute it with high-level `asyncio.run` which takes care of
-    managing the asyncio event loop, finalizing asynchronous generators, and closing
-    the threadpool.
+
+def parse_and_validate_query(schema, query, *, introspection):
+    """Parse the query string and validate the resulting document against the schema.
+    Return the document and a list of validation errors. Raise a GraphQLError if the
+    query can't be parsed.
+    Valid documents are cached, keyed by schema, introspection setting, and a digest
+    of the query string. Since clients send a limited number of distinct queries,
+    repeated requests skip parsing and validation.
     """
+    key = (schema, introspection, hashlib.sha256(query.encode()).digest())
+    document = document_cache.get(key)
+    if document is not None:
+        return document, []
+
+    document = parse(query)
+    errors = validate_query(schema, document, enable_introspection=introspection)
+    if not errors:
+        document_cache.set(key, document)
+    return document, errors
+
+
+async def execute_graphql(
+    schema,
+    data,
+    *,
+    context_value=None,
+    debug=False,
+    introspection=True,
+    error_formatter=format_database_errors,
+    max_cost=None,
+):
+    """Execute the GraphQL request data against the schema. Return a tuple of success
+    flag and result. This works like `ariadne.graphql` but takes the query document
+    from the cache (see `parse_and_validate_query()`).
+    If `max_cost` is given, the cost of the query is calculated before execution (see
+    `cost.calculate_query_cost()`) and reported in the `extensions` field of the
+    result. Queries exceeding the maximum cost are rejected.
+    """
+    extensions = None
+    try:
+        validate_data(data)
+        document, errors = parse_and_validate_query(
+            schema, data["query"], introspection=introspection
+        )
+        if errors:
+            return handle_graphql_errors(
+                errors, logger=None, error_formatter=error_formatter, debug=debug
+            )
+
+        if max_cost is not None:
+            cost = calculate_query_cost(
+                schema,
+                document,
+                variables=data.get("variables"),
+                operation_name=data.get("operationName"),
+            )
+            extensions = {"cost": {"requestedQueryCost": cost, "maximumCost": max_cost}}
+            if cost > max_cost:
+                raise GraphQLError(
+                    f"Query cost of {cost} exceeds maximum cost of {max_cost}",
+                    extensions={
+                        "code": "BAD_USER_INPUT",
+                        "description": "The query requests too much data. Reduce the "
+                        "page size, or the number of nested fields.",
+                    },
+                )
+
+        result = execute(
+            schema,
+            document,
+            context_value=context_value,
+            variable_values=data.get("variables"),
+            operation_name=data.get("operationName"),
+            middleware=[resolver_path_middleware],
+        )
+        if isawaitable(result):
+            result = await result
+    except GraphQLError as error:
+        success, response = handle_graphql_errors(
+            [error], logger=None, error_formatter=error_formatter, debug=debug
+        )
+    else:
+        success, response = handle_query_result(
+            result, logger=None, error_formatter=error_formatter, debug=debug
+        )
+
+    if extensions is not None:
+        response["extensions"] = extensions
+    return success, response
 
-    async def run():
-        # Create DataLoaders and persist them for the time of processing the request.
-        # DataLoaders require an event loop which is set up by asyncio.run
-        context = {
-            "location_loader": LocationLoader(),
-            "product_category_loader": ProductCategoryLoader(),
-            "product_loader": ProductLoader(),
-            "size_loader": SizeLoader(),
-            "size_range_loader": SizeRangeLoader(),
-            "sizes_for_size_range_loader": SizesForSizeRangeLoader(),
-            "tags_for_box_loader": TagsForBoxLoader(),
-        }
 
+def get_worker_event_loop():
+    """Return the event loop of the current thread. It is created on first use, and
+    re-used for all requests that the thread handles afterwards. This avoids the cost
+    of setting up and tearing down an event loop and its default thread pool executor
+    for every request.
+    """
+    loop = getattr(_worker, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _worker.loop = loop
+    return loop
+
+
+def run_in_worker_event_loop(coroutine):
+    """Run the coroutine to completion in the long-lived event loop of the current
+    worker thread, and return its result.
+    """
+    loop = get_worker_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coroutine)
+
+
+def report_sql_statistics(result, recorder, *, data, debug, log_context):
+    """Report statistics about the SQL statements executed for the GraphQL request. In
+    debug mode, they are added to the `extensions` field of the result; otherwise they
+    are logged.
+    """
+    statistics = recorder.statistics()
+    if debug:
+        result.setdefault("extensions", {})["sql"] = statistics
+    else:
+        log_sql_statistics_to_gcloud(
+            context=log_context,
+            statistics=statistics,
+            operation_name=data.get("operationName")
+            if isinstance(data, dict)
+            else None,
+        )
+
+
+def create_context():
+    """Create DataLoaders and persist them for the time of processing the request.
+    DataLoaders require an event loop, hence this function must be called from within
+    a coroutine.
+    """
+    return {
+        "base_loader": ModelLoader(Base),
+        "history_for_box_loader": HistoryForBoxLoader(),
+        "languages_for_beneficiary_loader": LanguagesForBeneficiaryLoader(),
+        "location_loader": LocationLoader(),
+        "metrics_loader": MetricsLoader(),
+        "organisation_loader": ModelLoader(Organisation),
+        "product_category_loader": ProductCategoryLoader(),
+        "product_loader": ProductLoader(),
+        "shipment_detail_for_box_loader": ShipmentDetailForBoxLoader(),
+        "shipment_loader": ModelLoader(Shipment),
+        "size_loader": SizeLoader(),
+        "size_range_loader": SizeRangeLoader(),
+        "sizes_for_size_range_loader": SizesForSizeRangeLoader(),
+        "tags_for_resource_loader": TagsForResourceLoader(),
+        "tokens_for_beneficiary_loader": TokensForBeneficiaryLoader(),
+        "transactions_for_beneficiary_loader": TransactionsForBeneficiaryLoader(),
+        # Products and locations of shipment details belong to either source or target
+        # base of the shipment; authorization is enforced in the resolvers
+        "unfiltered_location_loader": ModelLoader(Location),
+        "unfiltered_product_loader": ModelLoader(Product),
+    }
+
+
+def execute_async(*, schema, log_context, data=None, introspection=None, max_cost=None):
+    """Create coroutine and execute it in the event loop of the current worker thread.
+    Any state that must not be shared between requests (e.g. DataLoaders) is created
+    within the coroutine.
+    The GraphQL request data defaults to the JSON body of the current Flask request.
+    The maximum query cost is forwarded to `execute_graphql()`.
+    Executed SQL statements are recorded, and reported in the given logging context
+    (see `report_sql_statistics()`).
+    """
+    if data is None:
+        data = request.get_json()
+
+    async def run():
         # Execute the GraphQL request against schema, passing in context
-        results = await graphql(
+        results = await execute_graphql(
             schema,
-            data=request.get_json(),
-            context_value=context,
+            data,
+            context_value=create_context(),
             debug=current_app.debug,
             introspection=current_app.debug if introspection is None else introspection,
-            error_formatter=format_database_errors,
+            max_cost=max_cost,
         )
         return results
 
-    success, result = asyncio.run(run())
+    with record_sql_queries() as recorder:
+        success, result = run_in_worker_event_loop(run())
+    report_sql_statistics(
+        result, recorder, data=data, debug=current_app.debug, log_context=log_context
+    )
 
     status_code = 200 if success else 400
     return jsonify(result), status_code
@@ -1,4 +1,9 @@
-from ..models.definitions.beneficiary import Beneficiary
+import re
+
+from playhouse.mysql_ext import Match  # type: ignore
+
+from ..enums import BeneficiarySearchMode
+from ..models.definitions.beneficiary import BENEFICIARY_FULLTEXT_FIELDS, Beneficiary
 from ..models.definitions.box import Box
 
 
@@ -41,15 +46,46 @@ def derive_beneficiary_filter(filter_input):
 
     pattern = filter_input.get("pattern")
     if pattern is not None:
-        condition &= (
-            (Beneficiary.last_name.contains(pattern))
-            | (Beneficiary.first_name.contains(pattern))
-            | (Beneficiary.comment.contains(pattern))
-            | (Beneficiary.group_identifier == pattern)
+        condition &= _derive_beneficiary_pattern_filter(
+            pattern,
+            filter_input.get("search_mode") or BeneficiarySearchMode.Substring,
         )
     return condition
 
 
+def _derive_beneficiary_pattern_filter(pattern, search_mode):
+    """Derive filter condition for matching the given pattern in the given search mode.
+    Substring matching requires a full table scan. Prefix matching can use the indexes
+    on first and last name. Full-text search uses the FULLTEXT index, hence the MATCH
+    expression is not combined with other conditions via OR. A pattern without any
+    words falls back to substring matching.
+    """
+    if search_mode == BeneficiarySearchMode.Prefix:
+        return (
+            (Beneficiary.last_name.startswith(pattern))
+            | (Beneficiary.first_name.startswith(pattern))
+            | (Beneficiary.group_identifier == pattern)
+        )
+
+    if search_mode == BeneficiarySearchMode.FullText:
+        # Require every word of the pattern as word prefix. Non-word characters (incl.
+        # boolean-mode operators) act as separators
+        words = re.findall(r"\w+", pattern)
+        if words:
+            return Match(
+                BENEFICIARY_FULLTEXT_FIELDS,
+                " ".join(f"+{word}*" for word in words),
+                modifier="IN BOOLEAN MODE",
+            )
+
+    return (
+        (Beneficiary.last_name.contains(pattern))
+        | (Beneficiary.first_name.contains(pattern))
+        | (Beneficiary.comment.contains(pattern))
+        | (Beneficiary.group_identifier == pattern)
+    )
+
+
 def derive_box_filter(filter_input):
     """Derive filter condition for select-query from given filter parameters. If no
     parameters given, return True (i.e. no filtering applied).
@@ -1,16 +1,39 @@
 from collections import defaultdict
 
 from aiodataloader import DataLoader
+from peewee import fn
 
 from ..authz import authorize, authorized_bases_filter
-from ..enums import TaggableObjectType
+from ..business_logic.metrics.crud import compute_sales_metrics
+from ..business_logic.metrics.rollups import get_watermark
+from ..business_logic.warehouse.box.crud import get_box_histories
 from ..models.definitions.location import Location
 from ..models.definitions.product import Product
-from ..models.definitions.product_category import ProductCategory
-from ..models.definitions.size import Size
-from ..models.definitions.size_range import SizeRange
+from ..models.definitions.shipment_detail import ShipmentDetail
 from ..models.definitions.tag import Tag
 from ..models.definitions.tags_relation import TagsRelation
+from ..models.definitions.transaction import Transaction
+from ..models.definitions.x_beneficiary_language import XBeneficiaryLanguage
+from ..reference_data import get_reference_data
+
+
+class ModelLoader(DataLoader):
+    """Load instances of the given model by ID. Since loaders are created per request,
+    every row is fetched at most once while processing the request.
+    Contrary to e.g. `ProductLoader`, results are not filtered by the bases that the
+    current user is authorized for, hence the caller must enforce authorization.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    async def batch_load_fn(self, keys):
+        instances = {
+            instance.id: instance
+            for instance in self.model.select().where(self.model.id << keys)
+        }
+        return [instances.get(i) for i in keys]
 
 
 class ProductLoader(DataLoader):
@@ -38,40 +61,136 @@ class LocationLoader(DataLoader):
 class SizeLoader(DataLoader):
     async def batch_load_fn(self, keys):
         authorize(permission="size:read")
-        sizes = {s.id: s for s in Size.select()}
+        sizes = get_reference_data().sizes
         return [sizes.get(i) for i in keys]
 
 
-class TagsForBoxLoader(DataLoader):
+class TagsForResourceLoader(DataLoader):
     async def batch_load_fn(self, keys):
+        # Keys are tuples of resource type and resource ID. Group resource IDs by type
+        # such that one query per type is run
+        object_ids = defaultdict(list)
+        for object_type, object_id in keys:
+            object_ids[object_type].append(object_id)
+
         tags = defaultdict(list)
-        # maybe need different join type
-        for relation in (
-            TagsRelation.select(TagsRelation.object_type, TagsRelation.object_id, Tag)
-            .join(Tag)
-            .where(
-                TagsRelation.object_type == TaggableObjectType.Box,
-                TagsRelation.object_id << keys,
-                authorized_bases_filter(Tag),
+        for object_type, ids in object_ids.items():
+            for relation in (
+                TagsRelation.select(
+                    TagsRelation.object_type, TagsRelation.object_id, Tag
+                )
+                .join(Tag)
+                .where(
+                    TagsRelation.object_type == object_type,
+                    TagsRelation.object_id << ids,
+                    authorized_bases_filter(Tag),
+                )
+            ):
+                tags[(object_type, relation.object_id)].append(relation.tag)
+
+        # Return empty list if resource has no tags assigned
+        return [tags.get(key, []) for key in keys]
+
+
+class HistoryForBoxLoader(DataLoader):
+    async def batch_load_fn(self, keys):
+        # Keys are in fact box IDs
+        histories = get_box_histories(keys)
+        return [histories[i] for i in keys]
+
+
+class ShipmentDetailForBoxLoader(DataLoader):
+    async def batch_load_fn(self, keys):
+        # A box is part of at most one shipment that is currently active
+        details = {
+            detail.box_id: detail
+            for detail in ShipmentDetail.select().where(
+                ShipmentDetail.box << keys,
+                ShipmentDetail.removed_on.is_null(),
+                ShipmentDetail.lost_on.is_null(),
+                ShipmentDetail.received_on.is_null(),
+            )
+        }
+        # Keys are in fact box IDs. Return None if box is not part of a shipment
+        return [details.get(i) for i in keys]
+
+
+class TokensForBeneficiaryLoader(DataLoader):
+    async def batch_load_fn(self, keys):
+        authorize(permission="transaction:read")
+        balances = {
+            row.beneficiary_id: row.balance
+            for row in Transaction.select(
+                Transaction.beneficiary, fn.sum(Transaction.tokens).alias("balance")
             )
-        ):
-            tags[relation.object_id].append(relation.tag)
+            .where(Transaction.beneficiary << keys)
+            .group_by(Transaction.beneficiary)
+        }
+        # Keys are in fact beneficiary IDs. Return 0 if beneficiary has no
+        # transactions yet
+        return [balances.get(i) or 0 for i in keys]
+
 
-        # Keys are in fact box IDs. Return empty list if box has no tags assigned
-        return [tags.get(i, []) for i in keys]
+class TransactionsForBeneficiaryLoader(DataLoader):
+    async def batch_load_fn(self, keys):
+        authorize(permission="transaction:read")
+        transactions = defaultdict(list)
+        for transaction in Transaction.select().where(Transaction.beneficiary << keys):
+            transactions[transaction.beneficiary_id].append(transaction)
+        # Keys are in fact beneficiary IDs. Return empty list if beneficiary has no
+        # transactions
+        return [transactions.get(i, []) for i in keys]
+
+
+class LanguagesForBeneficiaryLoader(DataLoader):
+    async def batch_load_fn(self, keys):
+        # Mapping of beneficiary ID to list of language IDs. Use the FK column values
+        # directly, no need to join the Language model
+        languages = defaultdict(list)
+        for relation in XBeneficiaryLanguage.select(
+            XBeneficiaryLanguage.beneficiary, XBeneficiaryLanguage.language
+        ).where(XBeneficiaryLanguage.beneficiary << keys):
+            languages[relation.beneficiary_id].append(relation.language_id)
+        # Keys are in fact beneficiary IDs. Return empty list if beneficiary has no
+        # languages assigned
+        return [languages.get(i, []) for i in keys]
+
+
+class MetricsLoader(DataLoader):
+    async def batch_load_fn(self, keys):
+        # Keys are tuples of organisation ID, metric name, and date range (after,
+        # before). Compute all metrics requested for the same organisation and date
+        # range together
+        names = defaultdict(set)
+        for organisation_id, name, after, before in keys:
+            names[(organisation_id, after, before)].add(name)
+
+        watermark = get_watermark()
+        metrics = {}
+        for (organisation_id, after, before), names_for_range in names.items():
+            values = compute_sales_metrics(
+                organisation_id=organisation_id,
+                after=after,
+                before=before,
+                names=names_for_range,
+                watermark=watermark,
+            )
+            for name in names_for_range:
+                metrics[(organisation_id, name, after, before)] = values[name]
+        return [metrics[key] for key in keys]
 
 
 class ProductCategoryLoader(DataLoader):
     async def batch_load_fn(self, keys):
         authorize(permission="category:read")
-        categories = {c.id: c for c in ProductCategory.select()}
+        categories = get_reference_data().product_categories
         return [categories.get(i) for i in keys]
 
 
 class SizeRangeLoader(DataLoader):
     async def batch_load_fn(self, keys):
         authorize(permission="size_range:read")
-        ranges = {s.id: s for s in SizeRange.select()}
+        ranges = get_reference_data().size_ranges
         return [ranges.get(i) for i in keys]
 
 
@@ -79,8 +198,6 @@ class SizesForSizeRangeLoader(DataLoader):
     async def batch_load_fn(self, keys):
         authorize(permission="size:read")
         # Mapping of size range ID to list of sizes
-        sizes = defaultdict(list)
-        for size in Size.select():
-            sizes[size.size_range_id].append(size)
+        sizes = get_reference_data().sizes_for_size_range
         # Keys are in fact size range IDs. Return empty list if size range has no sizes
         return [sizes.get(i, []) for i in keys]
@@ -17,29 +17,59 @@ This way the first 4 elements are obtained.
 For determining the page meta data, the algorithm (`_generate_page_info()` function)
 - notices that the size of the slice (4) extends the requested limit (3), hence a next
   page exists
-- queries the model for any elements before the first one of the slice (ID 1). Since
-there aren't any, no previous page exists
+- notices that no cursor was given, hence no previous page exists
 - assigns the first element (ID 1) as the start cursor
 - assigns the second-to-last element (ID 3) as the end cursor
 Eventually, the page meta data, and first 3 elements (IDs 1, 2, 3) are returned.
 
 A request like
     query { models(after: 6, first: 3) { elements { id } } }
-selects
-                     |-----|
+selects the element that the cursor refers to along with the slice after it, i.e. the
+limit is increased by 2
+                   |-------|
     Model 1 2 3 4 5 6 7 8 9
 The algorithm
-- notices that the slice size (3) is not larger than the requested limit (3), hence no
-  next page exists
-- finds an element before ID 7, hence a previous page exists
+- finds the cursor element (ID 6) at the beginning of the slice, hence a previous page
+  exists. The cursor element is removed from the slice
+- notices that the remaining slice size (3) is not larger than the requested limit (3),
+  hence no next page exists
 - assigns ID 7 as start and ID 9 as end cursor
-
-For backward pagination, the procedure works in reverse.
+This way a single query per page is sufficient. If the cursor element does not match the
+conditions anymore (e.g. because it was deleted, or its sort value changed), the last
+element of the slice is dropped instead, and the existence of a previous page is
+determined by a second query for any element before the first one of the slice.
+
+For backward pagination, the procedure works in reverse: the elements before the cursor
+(and the cursor element) are selected in reverse order, and the slice is reversed
+afterwards.
+
+Optionally the elements are sorted by another field (e.g. `last_modified_on`). To make
+the order unique, the ID serves as tie-breaker. The cursor then encodes the composite
+key (sort value, ID) of an element, and the slice is selected by comparing the
+composite keys (keyset pagination), e.g. for forward pagination in ascending order
+    (field > value) OR (field = value AND id > ID)
+Hence the cost of fetching a page is independent of its position. NULL values are sorted
+as the smallest values (as MySQL does).
+
+The total count of elements matching the conditions is only computed if the client
+selects the `totalCount` field of the page. Counts of very large result sets are cached
+for a short time, i.e. they are approximate.
 """
 import base64
+import json
+import time
 
+from ..cache import LRUCache
+from ..db import db
+from ..enums import SortDirection
 from ..exceptions import InvalidPaginationInput
 
+# Total counts from this value upwards are cached for APPROXIMATE_COUNT_TTL seconds
+APPROXIMATE_COUNT_THRESHOLD = 10_000
+APPROXIMATE_COUNT_TTL = 60
+COUNT_CACHE_SIZE = 256
+count_cache = LRUCache(maxsize=COUNT_CACHE_SIZE)
+
 
 class PageInfo:
     """Container for pagination information."""
@@ -51,46 +81,191 @@ class PageInfo:
         self.end_cursor = ""
 
 
-def pagination_parameters(pagination_input):
-    """Retrieve cursor and limit (default: Cursor() and 50, resp.) from the given
-    pagination input dictionary.
+def page_size(pagination_input):
+    """Retrieve the limit (default: 50) from the given pagination input dictionary.
     The values of `after`/`first` take precedence over `before`/`last`.
+    Raise InvalidPaginationInput if the limit is negative.
     """
     limit = 50
     if pagination_input is None:
-        return Cursor(), limit
+        return limit
+
+    if (
+        pagination_input.get("after") is not None
+        or pagination_input.get("first") is not None
+    ):
+        limit = pagination_input.get("first") or limit
+    else:
+        limit = pagination_input.get("last", limit)
+    if limit is not None and limit < 0:
+        raise InvalidPaginationInput(reason="'first'/'last' must not be negative")
+    return limit
+
+
+def pagination_parameters(pagination_input, sort_key=None):
+    """Retrieve cursor and limit (default: Cursor() and 50, resp.) from the given
+    pagination input dictionary. The cursor refers to the given sort key.
+    The values of `after`/`first` take precedence over `before`/`last`.
+    """
+    limit = page_size(pagination_input)
+    if pagination_input is None:
+        return Cursor(sort_key=sort_key), limit
 
     after_value = pagination_input.get("after")
-    first = pagination_input.get("first")
-    if after_value is not None or first is not None:
-        return Cursor(after_value), first or limit
+    if after_value is not None or pagination_input.get("first") is not None:
+        return Cursor(after_value, sort_key=sort_key), limit
 
-    return Cursor(pagination_input.get("before"), forwards=False), pagination_input.get(
-        "last", limit
+    return (
+        Cursor(pagination_input.get("before"), forwards=False, sort_key=sort_key),
+        limit,
     )
 
 
+class SortKey:
+    """Order of elements by the given field (optional), and by ID as tie-breaker."""
+
+    def __init__(self, model, field=None, descending=False):
+        self.model = model
+        self.field = field
+        self.descending = descending
+
+    @classmethod
+    def from_input(cls, model, sort_input):
+        """Create sort key from the given sort input dictionary (holding the name of the
+        field to sort by, and the sort direction). Default to ascending order by ID.
+        """
+        if sort_input is None:
+            return cls(model)
+        return cls(
+            model,
+            getattr(model, sort_input["field"].value),
+            sort_input.get("direction") == SortDirection.Descending,
+        )
+
+    def key(self, element):
+        """Return the composite key of the given element, using values that can be
+        serialized to JSON.
+        """
+        if self.field is None:
+            return None, element.id
+        value = getattr(element, self.field.name)
+        if value is not None and not isinstance(value, (int, str)):
+            # e.g. datetime
+            value = str(value)
+        return value, element.id
+
+    def order_by(self, *, reverse=False):
+        """Return arguments for ModelSelect.order_by(), optionally in reverse order."""
+        descending = self.descending != reverse
+        fields = [self.model.id] if self.field is None else [self.field, self.model.id]
+        return [f.desc() if descending else f.asc() for f in fields]
+
+    def beyond(self, key, *, reverse=False):
+        """Return condition selecting all elements that come after the given composite
+        key in the sort order (or before it, if `reverse` is true).
+        """
+        value, id_ = key
+        greater = self.descending == reverse
+        id_condition = self.model.id > id_ if greater else self.model.id < id_
+        if self.field is None:
+            return id_condition
+
+        field = self.field
+        if value is None:
+            # NULL is the smallest value
+            if greater:
+                return (field.is_null() & id_condition) | field.is_null(False)
+            return field.is_null() & id_condition
+        if greater:
+            return (field > value) | ((field == value) & id_condition)
+        return (field < value) | ((field == value) & id_condition) | field.is_null()
+
+    def at(self, key):
+        """Return condition selecting the element with the given composite key."""
+        value, id_ = key
+        id_condition = self.model.id == id_
+        if self.field is None:
+            return id_condition
+        if value is None:
+            return id_condition & self.field.is_null()
+        return id_condition & (self.field == value)
+
+
 class Cursor:
     """Representation of pagination cursor, translating from GraphQL to data layer."""
 
-    def __init__(self, value=None, forwards=True):
+    def __init__(self, value=None, forwards=True, sort_key=None):
         """Decode and store value (a base64-encoded string).
-        The value serves as point to start a select query after/before (default: 0 for
-        forward pagination; not supported for backward pagination).
-        Assume forward pagination by default.
+        The value serves as point to start a select query after/before (default: start
+        of the model for forward pagination; not supported for backward pagination).
+        Assume forward pagination, and ordering by ID by default.
         """
         if value is None and not forwards:
             raise InvalidPaginationInput()
-        self.value = 0 if value is None else int(base64.b64decode(value))
         self.forwards = forwards
+        self.sort_key = sort_key
+        self.key = None if value is None else self._decode(value)
+
+    def _decode(self, value):
+        """Return the composite key encoded in the cursor value. Raise
+        InvalidPaginationInput if the value can't be decoded, e.g. if it was created
+        for a different sort order.
+        """
+        try:
+            decoded = base64.b64decode(value)
+            if self.sort_key is None or self.sort_key.field is None:
+                return None, int(decoded)
+            sort_value, id_ = json.loads(decoded)
+            return sort_value, int(id_)
+        except (ValueError, TypeError):
+            raise InvalidPaginationInput(reason="invalid cursor")
+
+    def encode(self, element):
+        """Encode the key of the given element into a cursor value. When ordering by
+        ID, zero-pad the element's ID to a byte-string of length 8. Otherwise serialize
+        the composite key to JSON. Return base64-encoded result as unicode string.
+        """
+        if self.sort_key is None or self.sort_key.field is None:
+            raw = f"{element.id:08}".encode()
+        else:
+            raw = json.dumps(self.sort_key.key(element)).encode()
+        return base64.b64encode(raw).decode()
 
     def pagination_condition(self, model):
         """Convert internal value into a condition that can be plugged into a
-        ModelSelect.where() clause for the given model.
+        ModelSelect.where() clause for the given model. The condition includes the
+        element that the cursor refers to.
         """
-        if self.forwards:
-            return model.id > self.value
-        return model.id < self.value
+        if self.key is None:
+            return True
+        sort_key = self._sort_key(model)
+        condition = sort_key.beyond(self.key, reverse=not self.forwards)
+        return (condition) | (sort_key.at(self.key))
+
+    def order_by(self, model):
+        """Return the order of selecting elements: for forward pagination the sort
+        order, for backward pagination the reverse sort order.
+        """
+        return self._sort_key(model).order_by(reverse=not self.forwards)
+
+    def query_limit(self, limit):
+        """Return the number of elements to select for a page of given limit: one more
+        for determining whether a next/previous page exists, and another one for the
+        cursor element, if any.
+        """
+        return limit + 1 if self.key is None else limit + 2
+
+    def remove_cursor_element(self, model, elements, limit):
+        """Remove the element that the cursor refers to from the given elements (in the
+        order as selected), and return at most `limit + 1` remaining elements. Also
+        return whether the cursor element was found, i.e. whether a previous/next page
+        exists during forward/backward pagination.
+        """
+        if self.key is None or not elements:
+            return elements, False
+        if self._sort_key(model).key(elements[0]) == self.key:
+            return elements[1:], True
+        return elements[: limit + 1], False
 
     def has_next_previous_page(self, *conditions, elements, selection):
         """For forward/backward pagination, determine whether a previous/next page
@@ -99,30 +274,29 @@ class Cursor:
         conditions).
         Additional conditions, e.g. for filtering, are taken into account.
         """
-        model = selection.model
+        sort_key = self._sort_key(selection.model)
         if self.forwards:
-            base_condition = model.id < elements[0].id
+            base_condition = sort_key.beyond(sort_key.key(elements[0]), reverse=True)
         else:
-            base_condition = model.id > elements[-1].id
+            base_condition = sort_key.beyond(sort_key.key(elements[-1]))
 
         for condition in conditions:
             base_condition = (base_condition) & (condition)
         return selection.where(base_condition).get_or_none() is not None
 
-
-def _encode_id(element):
-    """Zero-pad the element's ID to a byte-string of length 8, and base64-encode it.
-    Return encoded result as unicode string.
-    """
-    return base64.b64encode(f"{element.id:08}".encode()).decode()
+    def _sort_key(self, model):
+        return SortKey(model) if self.sort_key is None else self.sort_key
 
 
-def _generate_page_info(*conditions, elements, cursor, limit, **kwargs):
+def _generate_page_info(
+    *conditions, elements, cursor, limit, selection, cursor_element_found=False
+):
     """Generate pagination information from given elements and page limit. The elements
     comprise the current page and possibly the first element of the next/previous page.
     During forward/backward pagination, the following applies: If the number of elements
-    exceeds the limit, a next/previous page exists. Determining whether a previous/next
-    page exists is delegated to `Cursor.has_next_previous_page()`, passing `kwargs`.
+    exceeds the limit, a next/previous page exists. A previous/next page exists if the
+    element that the cursor refers to was found. If a cursor was given but its element
+    not found, this is delegated to `Cursor.has_next_previous_page()`.
     Derive cursors from the page's last/first elements.
     Return default PageInfo if no elements given (next/previous page cannot be
     determined efficiently even if existing). This is an edge case because it implies
@@ -132,41 +306,57 @@ def _generate_page_info(*conditions, elements, cursor, limit, **kwargs):
     if not elements:
         return info
 
-    has_next_previous_page = cursor.has_next_previous_page(
-        *conditions, elements=elements, **kwargs
+    has_next_previous_page = cursor_element_found or (
+        cursor.key is not None
+        and cursor.has_next_previous_page(
+            *conditions, elements=elements, selection=selection
+        )
     )
     if cursor.forwards:
         info.has_previous_page = has_next_previous_page
-        info.start_cursor = _encode_id(elements[0])
+        info.start_cursor = cursor.encode(elements[0])
         if len(elements) > limit:
             info.has_next_page = True
-            info.end_cursor = _encode_id(elements[-2])
+            info.end_cursor = cursor.encode(elements[-2])
         else:
-            info.end_cursor = _encode_id(elements[-1])
+            info.end_cursor = cursor.encode(elements[-1])
 
     else:
         info.has_next_page = has_next_previous_page
-        info.end_cursor = _encode_id(elements[-1])
+        info.end_cursor = cursor.encode(elements[-1])
         if len(elements) > limit:
             info.has_previous_page = True
-            info.start_cursor = _encode_id(elements[1])
+            info.start_cursor = cursor.encode(elements[1])
         else:
-            info.start_cursor = _encode_id(elements[0])
+            info.start_cursor = cursor.encode(elements[0])
 
     return info
 
 
 def _compute_total_count(*conditions, selection):
-    """Compute total count, taking given conditions and model selection into account."""
+    """Compute total count, taking given conditions and model selection into account.
+    If the count is at least `APPROXIMATE_COUNT_THRESHOLD`, cache it, and return the
+    cached value for identical selections until it expires.
+    """
     base_condition = True
     for condition in conditions:
         base_condition = (base_condition) & (condition)
-    return selection.where(base_condition).count()
+    query = selection.where(base_condition)
+
+    sql, params = query.sql()
+    key = (db.database.database, sql, tuple(params))
+    count = count_cache.get(key)
+    if count is None:
+        count = query.count()
+        if count >= APPROXIMATE_COUNT_THRESHOLD:
+            count_cache.set(key, count, expires_at=time.time() + APPROXIMATE_COUNT_TTL)
+    return count
 
 
 def generate_page(*conditions, elements, cursor, selection, **page_info_kwargs):
     """Return a GraphQL Page type wrapping the given elements, and including appropriate
-    page info.
+    page info. The total count is computed only when the corresponding field is
+    resolved, i.e. if it is part of the client's selection.
     """
     page_info = _generate_page_info(
         *conditions,
@@ -175,9 +365,14 @@ def generate_page(*conditions, elements, cursor, selection, **page_info_kwargs):
         selection=selection,
         **page_info_kwargs,
     )
+
+    def resolve_total_count(*_):
+        return _compute_total_count(*conditions, selection=selection)
+
     page = {
         "page_info": page_info,
-        "total_count": _compute_total_count(*conditions, selection=selection),
+        # Callables are invoked by Ariadne's default resolver
+        "total_count": resolve_total_count,
     }
 
     if cursor.forwards:
@@ -188,26 +383,39 @@ def generate_page(*conditions, elements, cursor, selection, **page_info_kwargs):
     return page
 
 
-def load_into_page(model, *conditions, selection=None, pagination_input):
+def load_into_page(
+    model, *conditions, selection=None, pagination_input, sort_input=None
+):
     """High-level convenience function to load result query of given model into a
     GraphQL page type.
     The query is constructed from the given selection (default: `model.select()`), and
-    optional conditions. The query results are ordered by model ID.
+    optional conditions. The query results are ordered by the field given in the sort
+    input (default: model ID), using the model ID as tie-breaker.
     """
-    cursor, limit = pagination_parameters(pagination_input)
+    sort_key = SortKey.from_input(model, sort_input)
+    cursor, limit = pagination_parameters(pagination_input, sort_key)
     pagination_condition = cursor.pagination_condition(model)
     for condition in conditions:
         pagination_condition = (condition) & (pagination_condition)
 
     if selection is None:
         selection = model.select()
-    query_result = (
-        selection.where(pagination_condition).order_by(model.id).limit(limit + 1)
+    query_result = list(
+        selection.where(pagination_condition)
+        .order_by(*cursor.order_by(model))
+        .limit(cursor.query_limit(limit))
+    )
+    query_result, cursor_element_found = cursor.remove_cursor_element(
+        model, query_result, limit
     )
+    if not cursor.forwards:
+        # Elements were selected in reverse order
+        query_result.reverse()
     return generate_page(
         *conditions,
         elements=query_result,
         cursor=cursor,
         limit=limit,
         selection=selection,
+        cursor_element_found=cursor_element_found,
     )
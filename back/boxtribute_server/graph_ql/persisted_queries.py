@@ -0,0 +1,80 @@
+"""Support for automatic persisted queries (APQ) following the protocol of Apollo, see
+https://www.apollographql.com/docs/apollo-server/performance/apq/
+
+A client sends the SHA-256 hash of a query in the request extensions
+    {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": "..."}}}
+If the server knows the hash, it executes the corresponding query. Otherwise it returns
+a PersistedQueryNotFound error, and the client sends the request again, including the
+full query text. The server then stores the query under its hash.
+"""
+import hashlib
+
+from ..cache import LRUCache
+from ..exceptions import (
+    InvalidPersistedQuery,
+    PersistedQueryHashMismatch,
+    PersistedQueryNotFound,
+)
+
+# Maximum number of queries kept in the in-process store
+PERSISTED_QUERY_STORE_SIZE = 1024
+
+
+class PersistedQueryStore:
+    """Store of query texts, keyed by their SHA-256 hash. Queries are kept in an
+    in-process LRU cache. Optionally a shared backend (e.g. a key-value store accessed
+    by all instances of the app) can be passed. It must provide `get(key)` and
+    `set(key, value)` methods, and is consulted when the in-process cache misses.
+    """
+
+    def __init__(self, maxsize=PERSISTED_QUERY_STORE_SIZE, *, backend=None):
+        self.cache = LRUCache(maxsize=maxsize)
+        self.backend = backend
+
+    def get(self, query_hash):
+        query = self.cache.get(query_hash)
+        if query is None and self.backend is not None:
+            query = self.backend.get(query_hash)
+            if query is not None:
+                self.cache.set(query_hash, query)
+        return query
+
+    def set(self, query_hash, query):
+        self.cache.set(query_hash, query)
+        if self.backend is not None:
+            self.backend.set(query_hash, query)
+
+
+persisted_query_store = PersistedQueryStore()
+
+
+def resolve_persisted_query(data, *, store=persisted_query_store):
+    """Return the GraphQL request data, including the query text.
+    Data without persisted-query extension is returned as is. If the data contain a
+    query hash but no query, look up the query text in the store. If the data contain
+    both, verify that they match, and store the query.
+    Raise PersistedQueryNotFound if the hash is unknown, and PersistedQueryHashMismatch
+    if the hash does not match the query. Raise InvalidPersistedQuery if hash or query
+    is not a string.
+    """
+    if not isinstance(data, dict):
+        return data
+    try:
+        query_hash = data["extensions"]["persistedQuery"]["sha256Hash"]
+    except (KeyError, TypeError):
+        return data
+
+    query = data.get("query")
+    if not isinstance(query_hash, str) or not isinstance(query, (str, type(None))):
+        raise InvalidPersistedQuery()
+
+    if query is None:
+        query = store.get(query_hash)
+        if query is None:
+            raise PersistedQueryNotFound()
+        return {**data, "query": query}
+
+    if hashlib.sha256(query.encode()).hexdigest() != query_hash:
+        raise PersistedQueryHashMismatch()
+    store.set(query_hash, query)
+    return data
@@ -0,0 +1,139 @@
+"""Per-request instrumentation of SQL queries.
+
+The database interface (see `db.py`) reports every executed SQL statement to the
+`SqlQueryRecorder` that is active in the current context. Statements are attributed to
+the path of the GraphQL field whose resolver was running when the statement was
+executed (e.g. `beneficiaries.elements.3.tokens`). Statements issued by DataLoaders
+are attributed to the field that first requested a value from the loader.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import time
+from inspect import isawaitable
+
+from peewee import SelectBase
+
+# Number of slowest statements that are reported per request
+SLOWEST_STATEMENTS_COUNT = 5
+
+_current_recorder: contextvars.ContextVar = contextvars.ContextVar(
+    "sql_query_recorder", default=None
+)
+_current_resolver_path: contextvars.ContextVar = contextvars.ContextVar(
+    "resolver_path", default=None
+)
+
+
+class SqlQueryRecorder:
+    """Container for the number of executed SQL statements, the total time spent on
+    executing them, and the slowest statements. Statements are also reported to the
+    parent recorder, if given.
+    """
+
+    def __init__(self, slowest_statements_count=SLOWEST_STATEMENTS_COUNT, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.total_duration = 0.0
+        self.slowest_statements_count = slowest_statements_count
+        # Min-heap of tuples of duration, sequence number, statement, and path
+        self._slowest_statements = []
+        self._sequence = itertools.count()
+
+    def record(self, sql, duration, path=None):
+        self.count += 1
+        self.total_duration += duration
+        entry = (duration, next(self._sequence), sql, path)
+        if len(self._slowest_statements) < self.slowest_statements_count:
+            heapq.heappush(self._slowest_statements, entry)
+        else:
+            heapq.heappushpop(self._slowest_statements, entry)
+        if self.parent is not None:
+            self.parent.record(sql, duration, path)
+
+    def statistics(self):
+        """Return statistics in a JSON-serializable format. Durations are given in
+        milliseconds.
+        """
+        return {
+            "queryCount": self.count,
+            "totalDuration": round(self.total_duration * 1000, 3),
+            "slowestQueries": [
+                {
+                    "sql": sql,
+                    "duration": round(duration * 1000, 3),
+                    "path": None if path is None else _format_path(path),
+                }
+                for duration, _, sql, path in sorted(
+                    self._slowest_statements, reverse=True
+                )
+            ],
+        }
+
+
+def _format_path(path):
+    return ".".join(str(key) for key in path.as_list())
+
+
+@contextlib.contextmanager
+def record_sql_queries():
+    """Record all SQL statements executed in the current context (and in any asyncio
+    tasks created from it). Yield the recorder. Recorders can be nested; the outer
+    recorder sees all statements of the inner one.
+    """
+    recorder = SqlQueryRecorder(parent=_current_recorder.get())
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+class InstrumentedDatabaseMixin:
+    """Mixin for peewee database classes. Report executed SQL statements to the
+    currently active recorder, if any.
+    """
+
+    def execute_sql(self, sql, *args, **kwargs):
+        recorder = _current_recorder.get()
+        if recorder is None:
+            return super().execute_sql(sql, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return super().execute_sql(sql, *args, **kwargs)
+        finally:
+            recorder.record(
+                sql, time.perf_counter() - start, _current_resolver_path.get()
+            )
+
+
+def resolver_path_middleware(resolve, obj, info, **kwargs):
+    """GraphQL middleware storing the path of the field that is currently resolved, for
+    attributing SQL statements to it.
+    """
+    if _current_recorder.get() is None:
+        return resolve(obj, info, **kwargs)
+
+    token = _current_resolver_path.set(info.path)
+    try:
+        result = resolve(obj, info, **kwargs)
+        if isinstance(result, SelectBase):
+            # Evaluate lazy select query here such that its execution is attributed to
+            # the field. It would be evaluated when completing the field value anyways
+            result = list(result)
+    finally:
+        _current_resolver_path.reset(token)
+
+    if isawaitable(result):
+        return _await_with_resolver_path(result, info.path)
+    return result
+
+
+async def _await_with_resolver_path(result, path):
+    token = _current_resolver_path.set(path)
+    try:
+        return await result
+    finally:
+        _current_resolver_path.reset(token)
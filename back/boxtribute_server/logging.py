@@ -28,12 +28,26 @@ else:  # pragma: no cover
     }
 
 
-def log_request_to_gcloud(*, context):
-    """Log the current request's JSON body to Google Cloud, depending on context."""
+def log_request_to_gcloud(*, context, payload=None):
+    """Log the given payload (default: the current Flask request's JSON body) to Google
+    Cloud, depending on context.
+    """
     if request_loggers is None:
         # Render function ineffective if loggers not defined
         return
 
     request_loggers[context].log_struct(
-        request.get_json(), severity="INFO"
+        request.get_json() if payload is None else payload, severity="INFO"
+    )  # pragma: no cover
+
+
+def log_sql_statistics_to_gcloud(*, context, statistics, operation_name=None):
+    """Log statistics about the SQL statements executed for a GraphQL request (see
+    `instrumentation.SqlQueryRecorder`) to Google Cloud, depending on context.
+    """
+    if request_loggers is None:
+        return
+
+    request_loggers[context].log_struct(
+        {"operationName": operation_name, "sql": statistics}, severity="INFO"
     )  # pragma: no cover
@@ -45,10 +45,14 @@ class Beneficiary(db.Model):
         column_name="extraportion", constraints=[SQL("DEFAULT 0")]
     )
     family_id = IntegerField()
-    first_name = CharField(column_name="firstname", constraints=[SQL("DEFAULT ''")])
+    first_name = CharField(
+        column_name="firstname", constraints=[SQL("DEFAULT ''")], index=True
+    )
     gender = CharField(constraints=[SQL("DEFAULT ''")])
     language = IntegerField(constraints=[SQL("DEFAULT 5")])
-    last_name = CharField(column_name="lastname", constraints=[SQL("DEFAULT ''")])
+    last_name = CharField(
+        column_name="lastname", constraints=[SQL("DEFAULT ''")], index=True
+    )
     laundry_block = IntegerField(
         column_name="laundryblock", constraints=[SQL("DEFAULT 0")]
     )
@@ -98,3 +102,19 @@ class Beneficiary(db.Model):
 
     class Meta:
         table_name = "people"
+
+
+# Columns for full-text search of beneficiaries. MATCH expressions must refer to exactly
+# the columns of the FULLTEXT index
+BENEFICIARY_FULLTEXT_FIELDS = [
+    Beneficiary.last_name,
+    Beneficiary.first_name,
+    Beneficiary.comment,
+    Beneficiary.group_identifier,
+]
+Beneficiary.add_index(
+    SQL(
+        "CREATE FULLTEXT INDEX people_fulltext "
+        "ON people (lastname, firstname, comments, container)"
+    )
+)
@@ -0,0 +1,33 @@
+from peewee import DateField, IntegerField
+
+from ...db import db
+from ..fields import UIntForeignKeyField
+from .base import Base
+from .product_category import ProductCategory
+
+
+# Number of sales per day, base, and product category, aggregated from the transactions
+# table (see business_logic/metrics/rollups.py). Not part of the dropapp schema
+class DailySales(db.Model):
+    date = DateField()
+    base = UIntForeignKeyField(
+        column_name="camp_id",
+        field="id",
+        model=Base,
+        on_delete="CASCADE",
+        on_update="CASCADE",
+        object_id_name="base_id",
+    )
+    product_category = UIntForeignKeyField(
+        column_name="category_id",
+        field="id",
+        model=ProductCategory,
+        null=True,
+        on_update="CASCADE",
+        object_id_name="product_category_id",
+    )
+    number_of_sales = IntegerField()
+
+    class Meta:
+        table_name = "metrics_daily_sales"
+        indexes = ((("base", "date"), False),)
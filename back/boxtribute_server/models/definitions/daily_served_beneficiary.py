@@ -0,0 +1,24 @@
+from peewee import CompositeKey, DateField
+
+from ...db import db
+from ..fields import UIntForeignKeyField
+from .beneficiary import Beneficiary
+
+
+# Beneficiaries that participated in a sale per day, aggregated from the transactions
+# table (see business_logic/metrics/rollups.py). Not part of the dropapp schema
+class DailyServedBeneficiary(db.Model):
+    date = DateField()
+    beneficiary = UIntForeignKeyField(
+        column_name="people_id",
+        field="id",
+        model=Beneficiary,
+        object_id_name="beneficiary_id",
+        on_delete="CASCADE",
+        on_update="CASCADE",
+    )
+
+    class Meta:
+        table_name = "metrics_daily_served_beneficiaries"
+        primary_key = CompositeKey("date", "beneficiary")
+        indexes = ((("beneficiary", "date"), False),)
@@ -0,0 +1,13 @@
+from peewee import CharField, DateField
+
+from ...db import db
+
+
+# Progress of aggregating data into the metrics rollup tables: all days before
+# `rolled_up_until` are aggregated. Not part of the dropapp schema
+class MetricsWatermark(db.Model):
+    name = CharField(primary_key=True)
+    rolled_up_until = DateField()
+
+    class Meta:
+        table_name = "metrics_watermarks"
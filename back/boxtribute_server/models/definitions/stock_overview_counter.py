@@ -0,0 +1,27 @@
+from peewee import CompositeKey, IntegerField
+
+from ...db import db
+from ...enums import LocationType
+from ..fields import EnumCharField, UIntForeignKeyField
+from .base import Base
+
+
+# Number of boxes, and of contained items, in the stock locations of a base per location
+# type, maintained on box mutations (see business_logic/metrics/stock_overview.py). Not
+# part of the dropapp schema
+class StockOverviewCounter(db.Model):
+    base = UIntForeignKeyField(
+        column_name="camp_id",
+        field="id",
+        model=Base,
+        on_delete="CASCADE",
+        on_update="CASCADE",
+        object_id_name="base_id",
+    )
+    location_type = EnumCharField(choices=LocationType)
+    number_of_boxes = IntegerField()
+    number_of_items = IntegerField()
+
+    class Meta:
+        table_name = "metrics_stock_overview"
+        primary_key = CompositeKey("base", "location_type")
@@ -12,6 +12,7 @@ class Transaction(db.Model):
         column_name="people_id",
         field="id",
         model=Beneficiary,
+        object_id_name="beneficiary_id",
         null=True,
         on_delete="SET NULL",
         on_update="CASCADE",
@@ -41,3 +42,4 @@ class Transaction(db.Model):
 
     class Meta:
         table_name = "transactions"
+        indexes = ((("beneficiary", "created_on"), False),)
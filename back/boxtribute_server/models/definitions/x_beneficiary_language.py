@@ -17,6 +17,7 @@ class XBeneficiaryLanguage(db.Model):
         field="id",
         model=Beneficiary,
         null=True,
+        object_id_name="beneficiary_id",
         on_update="CASCADE",
         on_delete="CASCADE",
     )
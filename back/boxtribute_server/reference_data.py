@@ -0,0 +1,81 @@
+"""Process-wide cache of reference data, i.e. the content of database tables that are
+rarely modified (sizes, size ranges, product categories). The data is loaded from the
+database at most once per time-to-live period, and shared between requests and worker
+threads. Cached model instances must be treated as read-only.
+
+The cache is not invalidated across processes: changes to the tables made by other
+processes (e.g. dropapp, or another worker) become visible once the time-to-live has
+passed.
+
+Product genders and box states are represented by enums (see `enums.py`) and hence are
+not fetched from the database.
+
+Authorization is not part of this module; callers have to enforce the permissions for
+reading the data on every request.
+"""
+import os
+import time
+from collections import defaultdict, namedtuple
+
+from .cache import LRUCache
+from .db import db
+from .models.definitions.product_category import ProductCategory
+from .models.definitions.size import Size
+from .models.definitions.size_range import SizeRange
+
+# Time-to-live of cached reference data in seconds (can be overwritten by the
+# environment variable REFERENCE_DATA_CACHE_TTL)
+DEFAULT_REFERENCE_DATA_CACHE_TTL = 600
+
+ReferenceData = namedtuple(
+    "ReferenceData",
+    ["sizes", "size_ranges", "product_categories", "sizes_for_size_range"],
+)
+
+_CACHE_KEY = "reference_data"
+reference_data_cache = LRUCache(maxsize=1)
+
+
+def reference_data_cache_ttl():
+    """Return the time-to-live of cached reference data in seconds."""
+    return int(os.getenv("REFERENCE_DATA_CACHE_TTL", DEFAULT_REFERENCE_DATA_CACHE_TTL))
+
+
+def _load_reference_data():
+    sizes = {s.id: s for s in Size.select()}
+    sizes_for_size_range = defaultdict(list)
+    for size in sizes.values():
+        sizes_for_size_range[size.size_range_id].append(size)
+    return ReferenceData(
+        sizes=sizes,
+        size_ranges={s.id: s for s in SizeRange.select()},
+        product_categories={c.id: c for c in ProductCategory.select()},
+        sizes_for_size_range=dict(sizes_for_size_range),
+    )
+
+
+def get_reference_data():
+    """Return cached reference data. Load it from the database if the cache is empty or
+    expired.
+    """
+    data = reference_data_cache.get(_CACHE_KEY)
+    if data is None:
+        data = _load_reference_data()
+        reference_data_cache.set(
+            _CACHE_KEY, data, expires_at=time.time() + reference_data_cache_ttl()
+        )
+    return data
+
+
+def invalidate_reference_data():
+    """Discard cached reference data of the current process. Must be called whenever
+    the process modifies the underlying tables, or changes the database.
+    """
+    reference_data_cache.delete(_CACHE_KEY)
+
+
+def warm_reference_data_cache():
+    """Load reference data into the cache ahead of the first request."""
+    invalidate_reference_data()
+    with db.database.connection_context():
+        get_reference_data()
@@ -7,8 +7,10 @@ from flask_cors import cross_origin
 
 from .auth import request_jwt, requires_auth
 from .authz import check_beta_feature_access
-from .exceptions import AuthenticationFailed
+from .exceptions import AuthenticationFailed, PersistedQueryError
+from .graph_ql.cost import query_api_max_cost
 from .graph_ql.execution import execute_async
+from .graph_ql.persisted_queries import resolve_persisted_query
 from .graph_ql.schema import full_api_schema, query_api_schema
 from .logging import API_CONTEXT, WEBAPP_CONTEXT, log_request_to_gcloud
 from .utils import in_development_environment
@@ -21,6 +23,17 @@ app_bp = Blueprint("app_bp", __name__)
 
 # Allowed headers for CORS
 CORS_HEADERS = ["Content-Type", "Authorization", "x-clacks-overhead"]
+# Allow dev localhost ports, and boxtribute subdomains as origins
+CORS_ORIGINS = [
+    "http://localhost:5005",
+    "http://localhost:3000",
+    "https://v2-staging.boxtribute.org",
+    "https://v2-demo.boxtribute.org",
+    "https://v2.boxtribute.org",
+    "https://v2-staging-dot-dropapp-242214.ew.r.appspot.com",
+    "https://v2-demo-dot-dropapp-242214.ew.r.appspot.com",
+    "https://v2-production-dot-dropapp-242214.ew.r.appspot.com",
+]
 
 
 @api_bp.errorhandler(AuthenticationFailed)
@@ -31,6 +44,16 @@ def handle_auth_error(ex):
     return response
 
 
+@api_bp.errorhandler(PersistedQueryError)
+@app_bp.errorhandler(PersistedQueryError)
+def handle_persisted_query_error(ex):
+    response = jsonify(
+        {"errors": [{"message": ex.message, "extensions": ex.extensions}]}
+    )
+    response.status_code = ex.status_code
+    return response
+
+
 @app_bp.route("/public", methods=["GET"])
 def public():
     response = (
@@ -50,8 +73,15 @@ def query_api_playground():
 @api_bp.route("/", methods=["POST"])
 @requires_auth
 def query_api_server():
-    log_request_to_gcloud(context=API_CONTEXT)
-    return execute_async(schema=query_api_schema, introspection=True)
+    data = resolve_persisted_query(request.get_json())
+    log_request_to_gcloud(context=API_CONTEXT, payload=data)
+    return execute_async(
+        schema=query_api_schema,
+        log_context=API_CONTEXT,
+        data=data,
+        introspection=True,
+        max_cost=query_api_max_cost(),
+    )
 
 
 @api_bp.route("/token", methods=["POST"])
@@ -72,28 +102,19 @@ def api_token():
 # see https://github.com/corydolphin/flask-cors/issues/280
 @app_bp.route("/graphql", methods=["POST"])
 @cross_origin(
-    # Allow dev localhost ports, and boxtribute subdomains as origins
-    origins=[
-        "http://localhost:5005",
-        "http://localhost:3000",
-        "https://v2-staging.boxtribute.org",
-        "https://v2-demo.boxtribute.org",
-        "https://v2.boxtribute.org",
-        "https://v2-staging-dot-dropapp-242214.ew.r.appspot.com",
-        "https://v2-demo-dot-dropapp-242214.ew.r.appspot.com",
-        "https://v2-production-dot-dropapp-242214.ew.r.appspot.com",
-    ],
+    origins=CORS_ORIGINS,
     methods=["POST"],
     allow_headers="*" if in_development_environment() else CORS_HEADERS,
 )
 @requires_auth
 def graphql_server():
-    log_request_to_gcloud(context=WEBAPP_CONTEXT)
+    data = resolve_persisted_query(request.get_json())
+    log_request_to_gcloud(context=WEBAPP_CONTEXT, payload=data)
 
-    if not check_beta_feature_access(request.get_json()["query"]):
+    if not check_beta_feature_access(data["query"]):
         return {"error": "No permission to access beta feature"}, 401
 
-    return execute_async(schema=full_api_schema)
+    return execute_async(schema=full_api_schema, log_context=WEBAPP_CONTEXT, data=data)
 
 
 @app_bp.route("/graphql", methods=["GET"])
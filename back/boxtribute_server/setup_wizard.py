@@ -16,6 +16,14 @@ Command: import-products
 price, in_shop, comments. The order is not relevant
 - the CSV file is to be formatted according to the 'csv.excel' dialect, i.e. comma as
 delimiter and double-quote as quote char.
+
+Command: refresh-metrics
+- aggregate the transactions of all complete days since the last refresh into the
+metrics rollup tables. Intended to be run daily, e.g. as cron job
+
+Command: reconcile-stock-overview
+- compare the maintained stock overview counters with the boxes table, and repair any
+drift (unless --dry-run is given). Intended to be run periodically, e.g. as cron job
 """
 
 import argparse
@@ -86,6 +94,18 @@ def _parse_options(args=None):
         "-t", "--target-base-id", type=int, required=True
     )
 
+    subparsers.add_parser(
+        "refresh-metrics", help="Aggregate recent transactions into metrics rollups"
+    )
+
+    reconcile_stock_overview_parser = subparsers.add_parser(
+        "reconcile-stock-overview",
+        help="Detect and repair drift of the stock overview counters",
+    )
+    reconcile_stock_overview_parser.add_argument(
+        "-n", "--dry-run", action="store_true", help="only report drift"
+    )
+
     return vars(parser.parse_args(args=args))
 
 
@@ -192,6 +212,38 @@ def _clone_products(*, source_base_id, target_base_id):
         )
 
 
+def _refresh_metrics():
+    """Refresh the metrics rollup tables, and log the new watermark."""
+    # Import here such that patching of db.database in main() takes effect
+    from boxtribute_server.business_logic.metrics.rollups import refresh_rollups
+
+    watermark = refresh_rollups()
+    if watermark is None:
+        LOGGER.info("Metrics rollups are up to date.")
+    else:
+        LOGGER.info(f"Aggregated metrics of all days before {watermark}.")
+
+
+def _reconcile_stock_overview(*, dry_run=False):
+    """Reconcile the stock overview counters, and log any drift."""
+    # Import here such that patching of db.database in main() takes effect
+    from boxtribute_server.business_logic.metrics.stock_overview import (
+        reconcile_stock_overview,
+    )
+
+    drift = reconcile_stock_overview(repair=not dry_run)
+    for d in drift:
+        LOGGER.info(
+            f"Base {d['base_id']}, {d['location_type'].name}: counted "
+            f"{d['counted_number_of_boxes']} boxes/{d['counted_number_of_items']} "
+            f"items, actual {d['number_of_boxes']} boxes/{d['number_of_items']} items"
+        )
+    if not drift:
+        LOGGER.info("Stock overview counters are up to date.")
+    elif not dry_run:
+        LOGGER.info(f"Repaired {len(drift)} stock overview counter(s).")
+
+
 def main(args=None):
     options = _parse_options(args=args)
 
@@ -212,6 +264,10 @@ def main(args=None):
             _import_products(**options)
         elif command == "clone-products":
             _clone_products(**options)
+        elif command == "refresh-metrics":
+            _refresh_metrics()
+        elif command == "reconcile-stock-overview":
+            _reconcile_stock_overview(**options)
     except Exception as e:
         LOGGER.exception(e) if verbose else LOGGER.error(e)
         raise SystemExit("Exiting due to above error.")
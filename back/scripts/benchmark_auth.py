@@ -0,0 +1,61 @@
+"""Measure the per-request cost of authenticating a JWT, comparing full verification
+(signature check and construction of user information) with a look-up in the cache of
+verified tokens.
+
+Usage:
+    python back/scripts/benchmark_auth.py [NUMBER_OF_REQUESTS]
+"""
+import sys
+import time
+import timeit
+from pathlib import Path
+
+SCRIPT_DIRPATH = Path(__file__).resolve().parent
+TEST_DATA_DIRPATH = SCRIPT_DIRPATH.parent / "test"
+sys.path.insert(0, str(TEST_DATA_DIRPATH))
+import boxtribute_server.auth
+from auth import JwksServer, create_jwt_payload  # type: ignore
+from boxtribute_server.auth import (
+    CurrentUser,
+    authenticate,
+    decode_jwt,
+    get_key_id,
+    get_public_key,
+)
+
+AUDIENCE = "boxtribute-benchmark-api"
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    boxtribute_server.auth.JWKS_URL_TEMPLATE = "http://{domain}/.well-known/jwks.json"
+
+    with JwksServer() as server:
+        server.add_key("key-1")
+        domain = server.domain
+        payload = create_jwt_payload()
+        payload.update(
+            aud=AUDIENCE, iss=f"https://{domain}/", exp=int(time.time()) + 3600
+        )
+        token = server.create_jwt(payload, key_id="key-1")
+
+        def uncached():
+            decoded_payload = decode_jwt(
+                token=token,
+                public_key=get_public_key(domain, key_id=get_key_id(token)),
+                domain=domain,
+                audience=AUDIENCE,
+            )
+            CurrentUser.from_jwt(decoded_payload)
+
+        def cached():
+            authenticate(token, domain=domain, audience=AUDIENCE)
+
+        for name, function in [("uncached", uncached), ("cached", cached)]:
+            function()  # warm up caches
+            seconds = timeit.timeit(function, number=number)
+            print(f"{name:10} {seconds / number * 1e6:10.1f} µs per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure the cost of filtering beneficiaries by pattern, comparing the search modes
+(substring, prefix, and full-text search) on a synthetic data set.
+
+The script requires a running MySQL server (e.g. the `db` service of the development
+setup). It creates a separate database `benchmark`, populates it with the test data and
+the given number of synthetic beneficiaries, and runs paginated queries with the
+pattern filter, restricted to a single base as in the GraphQL resolvers.
+
+Usage:
+    MYSQL_PORT=32000 python back/scripts/benchmark_beneficiary_search.py \
+        [NUMBER_OF_BENEFICIARIES] [NUMBER_OF_REPETITIONS]
+"""
+import random
+import string
+import sys
+import timeit
+
+from benchmark_database import benchmark_database, insert_in_batches, next_id
+from boxtribute_server.enums import BeneficiarySearchMode
+from boxtribute_server.graph_ql.filtering import derive_beneficiary_filter
+from boxtribute_server.models.definitions.beneficiary import Beneficiary
+from data.beneficiary import default_beneficiary_data  # type: ignore
+
+PAGE_SIZE = 50
+VOCABULARY_SIZE = 5_000
+
+
+def create_vocabulary(rng):
+    return [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))).title()
+        for _ in range(VOCABULARY_SIZE)
+    ]
+
+
+def insert_beneficiaries(number, vocabulary, rng):
+    template = default_beneficiary_data()
+    first_id = next_id(Beneficiary)
+    insert_in_batches(
+        Beneficiary,
+        (
+            {
+                **template,
+                "id": first_id + i,
+                "first_name": rng.choice(vocabulary),
+                "last_name": rng.choice(vocabulary),
+                "comment": " ".join(rng.choices(vocabulary, k=3)),
+                "group_identifier": f"{i // 4:06}",
+                "family_id": i // 4,
+            }
+            for i in range(number)
+        ),
+    )
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = random.Random(42)
+    vocabulary = create_vocabulary(rng)
+    # Word prefixes that occur in the data, and one that most likely does not
+    patterns = [word[:3] for word in rng.sample(vocabulary, 4)] + ["qxz"]
+
+    with benchmark_database() as database:
+        print(f"Inserting {number} beneficiaries...")
+        insert_beneficiaries(number, vocabulary, rng)
+        database.execute_sql("ANALYZE TABLE people")
+        base_id = default_beneficiary_data()["base"]
+
+        for search_mode in BeneficiarySearchMode:
+
+            def search():
+                for pattern in patterns:
+                    condition = derive_beneficiary_filter(
+                        {"pattern": pattern, "search_mode": search_mode}
+                    )
+                    list(
+                        Beneficiary.select()
+                        .where((Beneficiary.base == base_id) & condition)
+                        .order_by(Beneficiary.id)
+                        .limit(PAGE_SIZE + 1)
+                    )
+
+            search()  # warm up buffer pool
+            seconds = timeit.timeit(search, number=repetitions)
+            print(
+                f"{search_mode.name:10} "
+                f"{seconds / repetitions / len(patterns) * 1e3:10.2f} ms per query"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Set-up of a MySQL database for benchmarks that run SQL queries on synthetic data.
+
+The database server is expected to be reachable at MYSQL_HOST and MYSQL_PORT (e.g. the
+`db` service of the development setup).
+"""
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pymysql  # type: ignore
+from peewee import fn
+
+SCRIPT_DIRPATH = Path(__file__).resolve().parent
+TEST_DATA_DIRPATH = SCRIPT_DIRPATH.parent / "test"
+sys.path.insert(0, str(TEST_DATA_DIRPATH))
+from boxtribute_server.db import create_db_interface, db
+from data import MODELS, setup_models  # type: ignore
+
+MYSQL_CONNECTION_PARAMETERS = dict(
+    host=os.getenv("MYSQL_HOST", "127.0.0.1"),
+    port=int(os.getenv("MYSQL_PORT", 3306)),
+    user="root",
+    password="dropapp_root",
+)
+DATABASE_NAME = "benchmark"
+BATCH_SIZE = 10_000
+
+
+@contextmanager
+def benchmark_database():
+    """Create the `benchmark` database, create all tables, and populate them with the
+    test data. Yield the database interface, with all models bound to it. Drop all
+    tables on exit.
+    """
+    with pymysql.connect(**MYSQL_CONNECTION_PARAMETERS) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DATABASE_NAME}")
+    database = create_db_interface(
+        **MYSQL_CONNECTION_PARAMETERS, database=DATABASE_NAME
+    )
+    # The wrapped database of the FlaskDB is uninitialized outside of the app
+    db.database = database
+
+    with database.bind_ctx(MODELS):
+        database.drop_tables(MODELS)
+        database.create_tables(MODELS)
+        setup_models()
+        try:
+            yield database
+        finally:
+            database.drop_tables(MODELS)
+
+
+def next_id(model):
+    """Return the ID following the largest ID of the given model."""
+    return model.select(fn.MAX(model.id)).scalar() + 1
+
+
+def insert_in_batches(model, rows):
+    """Insert the rows (an iterable of dicts) into the table of the given model."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            model.insert_many(batch).execute()
+            batch = []
+    if batch:
+        model.insert_many(batch).execute()
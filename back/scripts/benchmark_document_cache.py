@@ -0,0 +1,48 @@
+"""Measure the cost of parsing and validating the GraphQL queries from the load-testing
+script, comparing the uncached path with look-ups in the document cache.
+
+Usage:
+    python back/scripts/benchmark_document_cache.py [NUMBER_OF_REPETITIONS]
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+from boxtribute_server.graph_ql.execution import (
+    document_cache,
+    parse_and_validate_query,
+)
+from boxtribute_server.graph_ql.schema import full_api_schema
+from graphql import parse, validate
+
+SCRIPT_DIRPATH = Path(__file__).resolve().parent
+
+
+def load_queries():
+    """Extract all (incl. commented) queries from the k6 load-testing script."""
+    content = (SCRIPT_DIRPATH / "load-test.js").read_text()
+    return re.findall(r'query: "(.+)",', content)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    queries = load_queries()
+
+    def uncached():
+        for query in queries:
+            validate(full_api_schema, parse(query))
+
+    def cached():
+        for query in queries:
+            parse_and_validate_query(full_api_schema, query, introspection=False)
+
+    for name, function in [("uncached", uncached), ("cached", cached)]:
+        function()  # warm up cache
+        seconds = timeit.timeit(function, number=number)
+        print(f"{name:10} {seconds / number / len(queries) * 1e6:10.1f} µs per request")
+    print(document_cache.cache_info())
+
+
+if __name__ == "__main__":
+    main()
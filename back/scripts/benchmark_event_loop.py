@@ -0,0 +1,43 @@
+"""Compare the request throughput of GraphQL execution when creating a new event loop
+per request (`asyncio.run`) with re-using the long-lived event loop of the worker
+thread. The executed query does not access the database, hence the measurement
+focusses on the overhead of the execution set-up.
+
+Usage:
+    python back/scripts/benchmark_event_loop.py [NUMBER_OF_REQUESTS]
+"""
+import asyncio
+import sys
+import timeit
+
+from ariadne import graphql
+from boxtribute_server.graph_ql.execution import (
+    create_context,
+    run_in_worker_event_loop,
+)
+from boxtribute_server.graph_ql.schema import full_api_schema
+
+DATA = {"query": "query { __typename }"}
+
+
+async def run():
+    success, result = await graphql(
+        full_api_schema, data=DATA, context_value=create_context()
+    )
+    assert success, result
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    for name, function in [
+        ("asyncio.run", lambda: asyncio.run(run())),
+        ("worker loop", lambda: run_in_worker_event_loop(run())),
+    ]:
+        function()  # warm up
+        seconds = timeit.timeit(function, number=number)
+        print(f"{name:12} {number / seconds:10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Measure the cost of computing the sales-related metrics (number of sales, families
+served, beneficiaries served) on a synthetic data set, comparing
+- separate: one query per metric (as previously executed when resolving the fields of
+  the Metrics type individually)
+- combined: a single query for all metrics of the same date range, using the
+  semi-join or the OR engine for the number of families/beneficiaries served
+- combined with rollups: like combined, taking daily rollups into account
+
+The script requires a running MySQL server (e.g. the `db` service of the development
+setup). It creates a separate database `benchmark`, and populates it with the test data,
+the given number of synthetic beneficiaries (in families of four), and ten transactions
+per family spread over two years.
+
+Usage:
+    MYSQL_PORT=32000 python back/scripts/benchmark_metrics.py \
+        [NUMBER_OF_BENEFICIARIES] [NUMBER_OF_REPETITIONS]
+"""
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+from benchmark_database import benchmark_database, insert_in_batches, next_id
+from boxtribute_server.business_logic.metrics.crud import (
+    DEFAULT_METRICS_QUERY_ENGINE,
+    SALES_METRICS,
+    SERVED_BENEFICIARIES_ENGINES,
+    compute_sales_metrics,
+)
+from boxtribute_server.business_logic.metrics.rollups import (
+    get_watermark,
+    refresh_rollups,
+)
+from boxtribute_server.models.definitions.beneficiary import Beneficiary
+from boxtribute_server.models.definitions.transaction import Transaction
+from data.base import data as base_data  # type: ignore
+from data.beneficiary import default_beneficiary_data  # type: ignore
+from data.transaction import default_transaction_data  # type: ignore
+
+FAMILY_SIZE = 4
+TRANSACTIONS_PER_FAMILY = 10
+START = datetime(2021, 1, 1)
+DAYS = 730
+DATE_RANGES = [
+    (None, None),
+    (date(2021, 6, 1), date(2022, 6, 1)),
+    (date(2022, 12, 1), None),
+]
+
+
+def insert_beneficiaries(number):
+    template = default_beneficiary_data()
+    first_id = next_id(Beneficiary)
+    insert_in_batches(
+        Beneficiary,
+        (
+            {
+                **template,
+                "id": first_id + i,
+                "family_head": first_id + i - i % FAMILY_SIZE
+                if i % FAMILY_SIZE
+                else None,
+                "group_identifier": f"{i // FAMILY_SIZE:06}",
+            }
+            for i in range(number)
+        ),
+    )
+    return first_id
+
+
+def insert_transactions(first_beneficiary_id, number_of_beneficiaries, rng):
+    template = default_transaction_data()
+    first_id = next_id(Transaction)
+    number_of_families = number_of_beneficiaries // FAMILY_SIZE
+    insert_in_batches(
+        Transaction,
+        (
+            {
+                **template,
+                "id": first_id + i,
+                "beneficiary": first_beneficiary_id
+                + rng.randrange(number_of_families) * FAMILY_SIZE,
+                "count": rng.randint(1, 5),
+                "created_on": START
+                + timedelta(days=rng.randrange(DAYS), seconds=rng.randrange(86_400)),
+            }
+            for i in range(number_of_families * TRANSACTIONS_PER_FAMILY)
+        ),
+    )
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(42)
+    organisation_id = base_data()[0]["organisation"]
+
+    def compute(*, combined, watermark, engine=DEFAULT_METRICS_QUERY_ENGINE):
+        for after, before in DATE_RANGES:
+            kwargs = dict(
+                organisation_id=organisation_id,
+                after=after,
+                before=before,
+                watermark=watermark,
+                engine=engine,
+            )
+            if combined:
+                compute_sales_metrics(names=SALES_METRICS, **kwargs)
+            else:
+                for name in SALES_METRICS:
+                    compute_sales_metrics(names={name}, **kwargs)
+
+    def measure(label, **kwargs):
+        compute(**kwargs)  # warm up buffer pool
+        seconds = timeit.timeit(lambda: compute(**kwargs), number=repetitions)
+        print(
+            f"{label:24} "
+            f"{seconds / repetitions / len(DATE_RANGES) * 1e3:10.2f} ms per date range"
+        )
+
+    with benchmark_database() as database:
+        print(f"Inserting {number} beneficiaries and their transactions...")
+        first_beneficiary_id = insert_beneficiaries(number)
+        insert_transactions(first_beneficiary_id, number, rng)
+        database.execute_sql("ANALYZE TABLE people, transactions")
+
+        measure("separate", combined=False, watermark=None)
+        for engine in SERVED_BENEFICIARIES_ENGINES:
+            measure(
+                f"combined ({engine})", combined=True, watermark=None, engine=engine
+            )
+        refresh_rollups(until=(START + timedelta(days=DAYS)).date())
+        measure("combined with rollups", combined=True, watermark=get_watermark())
+
+
+if __name__ == "__main__":
+    main()
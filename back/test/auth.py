@@ -1,6 +1,12 @@
+import base64
+import json
 import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
+import rsa
 from boxtribute_server.auth import JWT_CLAIM_PREFIX, request_jwt
+from jose import jwt
 
 TEST_AUTH0_DOMAIN = "boxtribute-dev.eu.auth0.com"
 TEST_AUTH0_AUDIENCE = "boxtribute-dev-api"
@@ -122,3 +128,78 @@ def create_jwt_payload(
         payload[f"{JWT_CLAIM_PREFIX}/permissions"] = permissions
 
     return payload
+
+
+def _encode_int(value):
+    """Base64url-encode an integer as required for the parameters of a JWK."""
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class JwksServer:
+    """Local stand-in for the JWKS endpoint of an Auth0 domain. The server runs in a
+    background thread, and serves the public parts of all signing keys that it holds.
+    Keys can be added and removed to simulate key rotation.
+    """
+
+    def __init__(self):
+        self.request_count = 0
+        self._private_keys = {}
+        self._public_keys = {}
+
+        jwks_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                jwks_server.request_count += 1
+                body = json.dumps(
+                    {"keys": list(jwks_server._public_keys.values())}
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def domain(self):
+        host, port = self._server.server_address
+        return f"{host}:{port}"
+
+    def add_key(self, key_id):
+        # Small key size for fast test execution
+        public_key, private_key = rsa.newkeys(1024)
+        self._private_keys[key_id] = private_key.save_pkcs1().decode()
+        self._public_keys[key_id] = {
+            "kty": "RSA",
+            "e": _encode_int(public_key.e),
+            "use": "sig",
+            "kid": key_id,
+            "n": _encode_int(public_key.n),
+        }
+
+    def remove_key(self, key_id):
+        del self._private_keys[key_id]
+        del self._public_keys[key_id]
+
+    def create_jwt(self, payload, *, key_id):
+        """Sign the payload with the private key of given ID."""
+        return jwt.encode(
+            payload,
+            self._private_keys[key_id],
+            algorithm="RS256",
+            headers={"kid": key_id},
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
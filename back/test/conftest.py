@@ -14,7 +14,9 @@ from contextlib import contextmanager
 
 import pymysql
 import pytest
+from auth import JwksServer
 from boxtribute_server.app import configure_app, create_app
+from boxtribute_server.auth import public_key_cache
 from boxtribute_server.db import create_db_interface, db
 from boxtribute_server.routes import api_bp, app_bp
 
@@ -134,3 +136,22 @@ def dropapp_dev_client():
         with app.app_context():
             yield app.test_client()
     db.close_db(None)
+
+
+@pytest.fixture
+def jwks_server(monkeypatch):
+    """Function fixture running a local HTTP server that stands in for the JWKS
+    endpoint of the Auth0 service. It initially holds a single signing key with ID
+    'key-1'. Any cached public keys are cleared before and after the test.
+    """
+    monkeypatch.delenv("AUTH0_JWKS_KID", raising=False)
+    monkeypatch.delenv("AUTH0_JWKS_N", raising=False)
+    monkeypatch.setattr(
+        "boxtribute_server.auth.JWKS_URL_TEMPLATE",
+        "http://{domain}/.well-known/jwks.json",
+    )
+    public_key_cache.clear()
+    with JwksServer() as server:
+        server.add_key("key-1")
+        yield server
+    public_key_cache.clear()
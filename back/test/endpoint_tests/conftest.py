@@ -1,8 +1,11 @@
 import pytest
 from auth import create_jwt_payload
+from boxtribute_server.asgi import create_query_api_asgi_app, create_webapp_asgi_app
+from boxtribute_server.instrumentation import record_sql_queries
 
 # Imports fixtures into tests
 from data import *  # noqa: F401,F403
+from starlette.testclient import TestClient
 
 
 @pytest.fixture(scope="module", autouse=True)
@@ -26,3 +29,24 @@ def auth_service(module_mocker):
 def unauthorized(mocker):
     """Effectively remove any permissions from current client."""
     mocker.patch("jose.jwt.decode").return_value = create_jwt_payload(permissions=[])
+
+
+@pytest.fixture
+def sql_query_recorder():
+    """Function fixture recording all SQL statements that are executed during the test
+    (see also `utils.assert_query_budget`).
+    """
+    with record_sql_queries() as recorder:
+        yield recorder
+
+
+@pytest.fixture(params=[create_webapp_asgi_app, create_query_api_asgi_app])
+def asgi_client(request, read_only_client):
+    """Function fixture for testing the ASGI variants of web app and query API. The
+    client accesses the same database as the `read_only_client` fixture. The requests
+    are sent with an authorization header.
+    """
+    app = request.param(read_only_client.application, max_worker_threads=2)
+    with TestClient(app, headers={"Authorization": "Bearer Some.Token"}) as client:
+        client.endpoint = "/graphql" if request.param is create_webapp_asgi_app else "/"
+        yield client
@@ -1,6 +1,9 @@
+import hashlib
+
 import peewee
 import pytest
 from auth import create_jwt_payload
+from boxtribute_server.graph_ql.persisted_queries import persisted_query_store
 from utils import assert_bad_user_input, assert_internal_server_error
 
 
@@ -254,3 +257,104 @@ def test_cors_preflight_request(read_only_client, origin):
         assert response.headers.get("Access-Control-Allow-Origin") == origin
         assert response.headers.get("Access-Control-Allow-Headers") == request_headers
         assert response.headers.get("Access-Control-Allow-Methods") == request_methods
+
+
+@pytest.mark.parametrize("endpoint", ["graphql", ""])
+def test_automatic_persisted_query(read_only_client, default_base, endpoint):
+    query = "query { base(id: 1) { name } }"
+    query_hash = hashlib.sha256(query.encode()).hexdigest()
+    extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+    persisted_query_store.cache.clear()
+
+    # Hash unknown to server
+    response = read_only_client.post(f"/{endpoint}", json={"extensions": extensions})
+    assert response.status_code == 200
+    assert response.json == {
+        "errors": [
+            {
+                "message": "PersistedQueryNotFound",
+                "extensions": {
+                    "code": "PERSISTED_QUERY_NOT_FOUND",
+                    "description": "The persisted query is unknown. "
+                    "Please send the full query.",
+                },
+            }
+        ]
+    }
+
+    # Register query
+    response = read_only_client.post(
+        f"/{endpoint}", json={"query": query, "extensions": extensions}
+    )
+    assert response.status_code == 200
+    assert response.json["data"]["base"]["name"] == default_base["name"]
+
+    # Hash known to server
+    response = read_only_client.post(f"/{endpoint}", json={"extensions": extensions})
+    assert response.status_code == 200
+    assert response.json["data"]["base"]["name"] == default_base["name"]
+
+    # Hash not matching query
+    extensions["persistedQuery"]["sha256Hash"] = "abc"
+    response = read_only_client.post(
+        f"/{endpoint}", json={"query": query, "extensions": extensions}
+    )
+    assert response.status_code == 400
+    assert response.json["errors"][0]["extensions"]["code"] == "BAD_USER_INPUT"
+
+    # Query or hash not being a string
+    for data in [
+        {"query": 1, "extensions": {"persistedQuery": {"sha256Hash": query_hash}}},
+        {"extensions": {"persistedQuery": {"sha256Hash": 1}}},
+        {"query": query, "extensions": {"persistedQuery": {"sha256Hash": []}}},
+    ]:
+        response = read_only_client.post(f"/{endpoint}", json=data)
+        assert response.status_code == 400
+        assert response.json["errors"][0]["extensions"]["code"] == "BAD_USER_INPUT"
+    persisted_query_store.cache.clear()
+
+
+def test_query_cost(read_only_client, monkeypatch):
+    query = """query { base(id: 1) {
+        beneficiaries(paginationInput: {first: 20}) { elements { id } } } }"""
+    response = read_only_client.post("/", json={"query": query})
+    assert response.status_code == 200
+    assert response.json["extensions"]["cost"]["requestedQueryCost"] == 22
+
+    # The full API is not limited
+    response = read_only_client.post("/graphql", json={"query": query})
+    assert response.status_code == 200
+    assert "extensions" not in response.json
+
+    monkeypatch.setenv("QUERY_API_MAX_COST", "21")
+    response = read_only_client.post("/", json={"query": query})
+    assert response.status_code == 400
+    assert "data" not in response.json
+    assert response.json["errors"][0]["extensions"]["code"] == "BAD_USER_INPUT"
+    assert response.json["extensions"]["cost"] == {
+        "requestedQueryCost": 22,
+        "maximumCost": 21,
+    }
+
+
+def test_sql_statistics_in_debug_mode(read_only_client, mocker):
+    query = "query { beneficiaries { elements { id tags { id } } } }"
+    log_statistics = mocker.patch(
+        "boxtribute_server.graph_ql.execution.log_sql_statistics_to_gcloud"
+    )
+    response = read_only_client.post("/graphql", json={"query": query})
+    assert response.status_code == 200
+    assert "extensions" not in response.json
+    statistics = log_statistics.call_args.kwargs["statistics"]
+    assert statistics["queryCount"] > 0
+
+    read_only_client.application.debug = True
+    response = read_only_client.post("/graphql", json={"query": query})
+    read_only_client.application.debug = False
+    assert response.status_code == 200
+    statistics = response.json["extensions"]["sql"]
+    assert statistics["queryCount"] > 0
+    assert statistics["totalDuration"] > 0
+    paths = [q["path"] for q in statistics["slowestQueries"]]
+    assert "beneficiaries" in paths
+    assert log_statistics.call_count == 1
@@ -0,0 +1,76 @@
+def test_query(asgi_client, default_base):
+    query = """query { base(id: 1) { name } }"""
+    response = asgi_client.post(asgi_client.endpoint, json={"query": query})
+    assert response.status_code == 200
+    assert response.json()["data"] == {"base": {"name": default_base["name"]}}
+
+    # Several requests are processed by the same worker threads
+    queries = [f"query {{ base(id: 1) {{ id }} }} # {i}" for i in range(5)]
+    for query in queries:
+        response = asgi_client.post(asgi_client.endpoint, json={"query": query})
+        assert response.json()["data"] == {"base": {"id": "1"}}
+
+
+def test_query_non_existent_resource(asgi_client):
+    query = """query { organisation(id: 0) { name } }"""
+    response = asgi_client.post(asgi_client.endpoint, json={"query": query})
+    assert response.status_code == 200
+    assert response.json()["data"]["organisation"] is None
+    assert response.json()["errors"][0]["extensions"]["code"] == "BAD_USER_INPUT"
+
+
+def test_query_cost(asgi_client):
+    query = """query { base(id: 1) { locations { name } } }"""
+    response = asgi_client.post(asgi_client.endpoint, json={"query": query})
+    assert response.status_code == 200
+    if asgi_client.endpoint == "/graphql":
+        assert "extensions" not in response.json()
+    else:
+        assert response.json()["extensions"]["cost"]["requestedQueryCost"] == 11
+
+
+def test_invalid_requests(asgi_client):
+    response = asgi_client.post(asgi_client.endpoint, json={"query": "{ invalid }"})
+    assert response.status_code == 400
+    assert len(response.json()["errors"]) == 1
+
+    response = asgi_client.post(asgi_client.endpoint, content="no JSON")
+    assert response.status_code == 400
+
+    response = asgi_client.post(
+        asgi_client.endpoint,
+        json={"query": 1, "extensions": {"persistedQuery": {"sha256Hash": "abc"}}},
+    )
+    assert response.status_code == 400
+
+    response = asgi_client.post(
+        asgi_client.endpoint,
+        json={"query": "{ base(id: 1) { id } }"},
+        headers={"Authorization": ""},
+    )
+    assert response.status_code == 401
+    assert response.json()["code"] == "authorization_header_missing"
+
+
+def test_playground(asgi_client):
+    response = asgi_client.get(asgi_client.endpoint)
+    assert response.status_code == 200
+    assert "<html>" in response.text.lower()
+
+
+def test_cors_preflight_request(asgi_client):
+    origin = "https://v2.boxtribute.org"
+    response = asgi_client.options(
+        "/graphql",
+        headers={
+            "origin": origin,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "Authorization",
+        },
+    )
+    if asgi_client.endpoint == "/graphql":
+        assert response.status_code == 200
+        assert response.headers.get("Access-Control-Allow-Origin") == origin
+        assert response.headers.get("Access-Control-Allow-Methods") == "POST"
+    else:
+        assert response.headers.get("Access-Control-Allow-Origin") is None
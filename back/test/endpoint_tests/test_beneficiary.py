@@ -1,8 +1,11 @@
 from datetime import date
 
 import pytest
+from boxtribute_server.db import db
 from boxtribute_server.enums import HumanGender
-from utils import assert_successful_request
+from boxtribute_server.graph_ql import pagination
+from boxtribute_server.models.definitions.beneficiary import Beneficiary
+from utils import assert_bad_user_input, assert_query_budget, assert_successful_request
 
 
 def _generate_beneficiary_query(id):
@@ -285,6 +288,160 @@ def test_beneficiaries_paginated_query(
     assert pages["pageInfo"]["hasPreviousPage"] == has_previous_page
 
 
+@pytest.mark.parametrize("pagination_input", ["{ first: -1 }", "{ last: -1 }"])
+def test_beneficiaries_paginated_query_with_negative_page_size(
+    read_only_client, pagination_input
+):
+    query = f"""query {{ beneficiaries(paginationInput: {pagination_input}) {{
+        elements {{ id }} }} }}"""
+    response = assert_bad_user_input(read_only_client, query, verify_response=False)
+    assert "must not be negative" in (
+        response.json["errors"][0]["extensions"]["description"]
+    )
+
+
+@pytest.mark.parametrize(
+    "sort_input,ids",
+    [
+        ["{ field: lastName }", ["1", "2", "3"]],
+        ["{ field: lastName, direction: Descending }", ["3", "2", "1"]],
+        ["{ field: firstName, direction: Descending }", ["3", "2", "1"]],
+        ["{ field: createdOn, direction: Ascending }", ["1", "2", "3"]],
+    ],
+)
+def test_beneficiaries_sorted_query(read_only_client, sort_input, ids):
+    query = f"""query {{ beneficiaries(sortInput: {sort_input}) {{
+        elements {{ id }} }} }}"""
+    beneficiaries = assert_successful_request(read_only_client, query)
+    assert [b["id"] for b in beneficiaries["elements"]] == ids
+
+    # The cursor of the first element refers to its sort key
+    query = f"""query {{ beneficiaries(sortInput: {sort_input},
+        paginationInput: {{ first: 1 }}) {{ pageInfo {{ endCursor }} }} }}"""
+    cursor = assert_successful_request(read_only_client, query)["pageInfo"]["endCursor"]
+    query = f"""query {{ beneficiaries(sortInput: {sort_input},
+        paginationInput: {{ after: "{cursor}", first: 1 }}) {{
+            elements {{ id }} pageInfo {{ hasNextPage hasPreviousPage }} }} }}"""
+    beneficiaries = assert_successful_request(read_only_client, query)
+    assert beneficiaries == {
+        "elements": [{"id": ids[1]}],
+        "pageInfo": {"hasNextPage": True, "hasPreviousPage": True},
+    }
+
+
+@pytest.mark.parametrize(
+    "sort_input,cursor",
+    [
+        # ID=1, cursor for ordering by ID
+        ["{ field: lastName }", "MDAwMDAwMDE="],
+        # '[1]'
+        ["{ field: lastName }", "WzFd"],
+        # 'not JSON'
+        ["{ field: lastName }", "bm90IEpTT04="],
+        # Not base64-encoded
+        ["{ field: lastName }", "???"],
+        # '["Body", 1]', cursor for ordering by lastName
+        [None, "WyJCb2R5IiwgMV0="],
+    ],
+)
+def test_beneficiaries_paginated_query_with_invalid_cursor(
+    read_only_client, sort_input, cursor
+):
+    sort_argument = "" if sort_input is None else f"sortInput: {sort_input}, "
+    query = f"""query {{ beneficiaries({sort_argument}
+        paginationInput: {{ after: "{cursor}" }}) {{ elements {{ id }} }} }}"""
+    response = assert_bad_user_input(read_only_client, query, verify_response=False)
+    assert "invalid cursor" in response.json["errors"][0]["extensions"]["description"]
+
+
+def test_beneficiaries_query_total_count(read_only_client):
+    query = "query { beneficiaries { elements { id } } }"
+    _, count_without_total_count = assert_query_budget(
+        read_only_client, query, max_queries=1
+    )
+
+    query = "query { beneficiaries { elements { id } totalCount } }"
+    data, count = assert_query_budget(read_only_client, query, max_queries=2)
+    assert data["beneficiaries"]["totalCount"] == 3
+    # The COUNT query is only run if totalCount is selected
+    assert count == count_without_total_count + 1
+
+
+@pytest.mark.parametrize(
+    "pagination_input,ids,has_previous_page",
+    [
+        ["{ first: 1 }", ["1"], False],
+        # ID=1
+        ['{ after: "MDAwMDAwMDE=", first: 1 }', ["2"], True],
+        # ID=3
+        ['{ before: "MDAwMDAwMDM=", last: 1 }', ["2"], True],
+    ],
+)
+def test_beneficiaries_paginated_query_budget(
+    read_only_client, pagination_input, ids, has_previous_page
+):
+    # Page elements and page info are fetched in a single query
+    query = f"""query {{ beneficiaries(paginationInput: {pagination_input}) {{
+        elements {{ id }} pageInfo {{ hasNextPage hasPreviousPage }} }} }}"""
+    data, _ = assert_query_budget(read_only_client, query, max_queries=1)
+    assert data["beneficiaries"] == {
+        "elements": [{"id": i} for i in ids],
+        "pageInfo": {"hasNextPage": True, "hasPreviousPage": has_previous_page},
+    }
+
+
+def test_beneficiaries_query_approximate_total_count(
+    client, default_beneficiary, mocker
+):
+    mocker.patch.object(pagination, "APPROXIMATE_COUNT_THRESHOLD", 3)
+    pagination.count_cache.clear()
+    query = "query { beneficiaries { totalCount } }"
+    data = assert_successful_request(client, query)
+    assert data["totalCount"] == 3
+
+    Beneficiary.create(**{**default_beneficiary, "id": 100})
+    db.close_db(None)
+    # Large count is served from cache
+    data = assert_successful_request(client, query)
+    assert data["totalCount"] == 3
+
+    pagination.count_cache.clear()
+    data = assert_successful_request(client, query)
+    assert data["totalCount"] == 4
+    pagination.count_cache.clear()
+
+
+def test_beneficiaries_paginated_query_with_removed_cursor_element(
+    client, default_beneficiary
+):
+    Beneficiary.insert_many(
+        [{**default_beneficiary, "id": i} for i in range(100, 107)]
+    ).execute()
+    Beneficiary.delete_by_id(103)
+    db.close_db(None)
+    # ID=103
+    cursor = "MDAwMDAxMDM="
+
+    # Pages have the requested size although the cursor element was not found
+    query = f"""query {{ beneficiaries(
+        paginationInput: {{ after: "{cursor}", first: 2 }}) {{
+            elements {{ id }} pageInfo {{ hasNextPage hasPreviousPage }} }} }}"""
+    data = assert_successful_request(client, query)
+    assert data == {
+        "elements": [{"id": "104"}, {"id": "105"}],
+        "pageInfo": {"hasNextPage": True, "hasPreviousPage": True},
+    }
+
+    query = f"""query {{ beneficiaries(
+        paginationInput: {{ before: "{cursor}", last: 2 }}) {{
+            elements {{ id }} pageInfo {{ hasNextPage hasPreviousPage }} }} }}"""
+    data = assert_successful_request(client, query)
+    assert data == {
+        "elements": [{"id": "101"}, {"id": "102"}],
+        "pageInfo": {"hasNextPage": True, "hasPreviousPage": True},
+    }
+
+
 def _format(parameter):
     try:
         return ",".join(f"{k}={v}" for f in parameter for k, v in f.items())
@@ -310,6 +467,13 @@ def _format(parameter):
         [[{"pattern": '"Z"'}], 0],
         [[{"pattern": '"1234"'}], 2],
         [[{"pattern": '"123"'}], 0],
+        [[{"pattern": '"bo"'}, {"searchMode": "Prefix"}], 2],
+        [[{"pattern": '"od"'}, {"searchMode": "Prefix"}], 0],
+        [[{"pattern": '"1234"'}, {"searchMode": "Prefix"}], 2],
+        [[{"pattern": '"bod"'}, {"searchMode": "FullText"}], 2],
+        [[{"pattern": '"fun comm"'}, {"searchMode": "FullText"}], 1],
+        [[{"pattern": '"123"'}, {"searchMode": "FullText"}], 2],
+        [[{"pattern": '"od"'}, {"searchMode": "Substring"}], 2],
         [[{"createdFrom": '"2022-01-01"'}, {"active": "true"}], 1],
         [[{"active": "true"}, {"registered": "false"}], 0],
         [[{"active": "false"}, {"pattern": '"no"'}], 1],
@@ -1,3 +1,4 @@
+import pytest
 from boxtribute_server.enums import BoxState
 from utils import assert_successful_request
 
@@ -50,3 +51,49 @@ def test_locations_query(read_only_client, base1_classic_locations):
     query = """query { locations { name } }"""
     locations = assert_successful_request(read_only_client, query)
     assert locations == [{"name": loc["name"]} for loc in base1_classic_locations]
+
+
+@pytest.mark.parametrize("direction", ["Ascending", "Descending"])
+def test_location_boxes_sorted_query(
+    read_only_client, default_location, default_location_boxes, direction
+):
+    expected_ids = [
+        str(b["id"])
+        for b in sorted(
+            default_location_boxes,
+            key=lambda b: (b["last_modified_on"], b["id"]),
+            reverse=direction == "Descending",
+        )
+    ]
+
+    # Page through the boxes in both directions
+    ids = []
+    pagination_input = "{ first: 2 }"
+    while True:
+        query = f"""query {{ location(id: "{default_location['id']}") {{
+            boxes(paginationInput: {pagination_input},
+                sortInput: {{ field: lastModifiedOn, direction: {direction} }}) {{
+                    elements {{ id }}
+                    pageInfo {{ hasNextPage endCursor }} }} }} }}"""
+        page = assert_successful_request(read_only_client, query)["boxes"]
+        ids.extend(b["id"] for b in page["elements"])
+        if not page["pageInfo"]["hasNextPage"]:
+            break
+        pagination_input = f'{{ after: "{page["pageInfo"]["endCursor"]}", first: 2 }}'
+    assert ids == expected_ids
+
+    ids = []
+    pagination_input = f'{{ before: "{page["pageInfo"]["endCursor"]}", last: 2 }}'
+    while True:
+        query = f"""query {{ location(id: "{default_location['id']}") {{
+            boxes(paginationInput: {pagination_input},
+                sortInput: {{ field: lastModifiedOn, direction: {direction} }}) {{
+                    elements {{ id }}
+                    pageInfo {{ hasPreviousPage startCursor }} }} }} }}"""
+        page = assert_successful_request(read_only_client, query)["boxes"]
+        ids[:0] = [b["id"] for b in page["elements"]]
+        if not page["pageInfo"]["hasPreviousPage"]:
+            break
+        start_cursor = page["pageInfo"]["startCursor"]
+        pagination_input = f'{{ before: "{start_cursor}", last: 2 }}'
+    assert ids == expected_ids[:-1]
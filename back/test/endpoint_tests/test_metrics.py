@@ -1,5 +1,14 @@
+from datetime import date, timedelta
+
 import pytest
 from auth import create_jwt_payload
+from boxtribute_server.business_logic.metrics.rollups import refresh_rollups
+from boxtribute_server.business_logic.metrics.stock_overview import (
+    reconcile_stock_overview,
+)
+from boxtribute_server.db import db
+from boxtribute_server.models.definitions.transaction import Transaction
+from boxtribute_server.models.utils import utcnow
 from utils import assert_successful_request
 
 
@@ -80,6 +89,38 @@ def test_metrics_query_stock_overview(
     }
 
 
+def test_metrics_query_stock_overview_with_counters(
+    client, default_product, default_location, distribution_spot, default_size
+):
+    query = "query { metrics { stockOverview { numberOfBoxes numberOfItems } } }"
+    overview = assert_successful_request(client, query, field="metrics")
+
+    # The boxes of the test data are not counted until the first reconciliation
+    assert reconcile_stock_overview() != []
+    db.close_db(None)
+    assert assert_successful_request(client, query, field="metrics") == overview
+
+    # Counters are maintained on box creation and update
+    creation_input = f"""creationInput: {{ productId: {default_product["id"]}
+        locationId: {default_location["id"]} sizeId: {default_size["id"]}
+        numberOfItems: 10 }}"""
+    mutation = f"mutation {{ createBox({creation_input}) {{ labelIdentifier }} }}"
+    label_identifier = assert_successful_request(client, mutation)["labelIdentifier"]
+    update_input = f"""updateInput: {{ labelIdentifier: "{label_identifier}"
+        locationId: {distribution_spot["id"]} numberOfItems: 4 }}"""
+    mutation = f"mutation {{ updateBox({update_input}) {{ labelIdentifier }} }}"
+    assert_successful_request(client, mutation)
+
+    stock_overview = overview["stockOverview"]
+    assert assert_successful_request(client, query, field="metrics") == {
+        "stockOverview": {
+            "numberOfBoxes": stock_overview["numberOfBoxes"] + 1,
+            "numberOfItems": stock_overview["numberOfItems"] + 4,
+        }
+    }
+    assert reconcile_stock_overview(repair=False) == []
+
+
 @pytest.mark.parametrize(
     "filters,box_ids",
     [
@@ -117,6 +158,83 @@ def test_metrics_query_moved_stock_overview(
         }
 
 
+def first_day_of_interval(day, interval):
+    if interval == "Day":
+        return day
+    if interval == "Week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+@pytest.mark.parametrize("interval", ["Day", "Week", "Month"])
+@pytest.mark.parametrize(
+    "filters,transaction_years",
+    [
+        ["", [2020, 2021]],
+        ["""after: "2021-01-01", """, [2021]],
+        ["""after: "2022-01-01", """, []],
+        ["""before: "2021-01-01", """, [2020]],
+    ],
+)
+def test_metrics_query_sales_timeseries(
+    read_only_client,
+    default_transaction,
+    relative_transaction,
+    filters,
+    transaction_years,
+    interval,
+):
+    query = f"""query {{ metrics {{ salesTimeseries({filters}interval: {interval}) {{
+                date numberOfSales }} }} }}"""
+    response = assert_successful_request(read_only_client, query, field="metrics")
+
+    # Test transactions: two in 2020 (relative and another), one in 2021 (default)
+    count = default_transaction["count"]
+    number_of_sales = {2020: 2 * count, 2021: count}
+    assert response == {
+        "salesTimeseries": [
+            {
+                "date": first_day_of_interval(
+                    default_transaction["created_on"].replace(year=year).date(),
+                    interval,
+                ).isoformat(),
+                "numberOfSales": number_of_sales[year],
+            }
+            for year in transaction_years
+        ]
+    }
+
+
+@pytest.mark.parametrize(
+    "interval,dates",
+    [
+        ["Day", ["2020-11-27", "2021-02-02"]],
+        ["Week", ["2020-11-23", "2021-02-01"]],
+        ["Month", ["2020-11-01", "2021-02-01"]],
+    ],
+)
+def test_metrics_query_moved_stock_timeseries(
+    read_only_client, default_boxes, interval, dates
+):
+    query = f"""query {{ metrics {{ movedStockTimeseries(interval: {interval}) {{
+                date productCategoryName numberOfBoxes numberOfItems }} }} }}"""
+    response = assert_successful_request(read_only_client, query, field="metrics")
+
+    # Boxes moved by client's organisation: 2, 3, 5 in Nov 2020; 6, 7 in Feb 2021
+    timeseries = []
+    for date_, box_ids in zip(dates, [[2, 3, 5], [6, 7]]):
+        boxes = [b for b in default_boxes if b["id"] in box_ids]
+        timeseries.append(
+            {
+                "date": date_,
+                "productCategoryName": "Underwear / Nightwear",
+                "numberOfBoxes": len(boxes),
+                "numberOfItems": sum(b["number_of_items"] for b in boxes),
+            }
+        )
+    assert response == {"movedStockTimeseries": timeseries}
+
+
 @pytest.mark.parametrize(
     "organisation_id,number_of_families_served,number_of_sales", [[1, 2, 6], [2, 0, 0]]
 )
@@ -137,3 +255,47 @@ def test_metrics_query_for_god_user(
         "numberOfFamiliesServed": number_of_families_served,
         "numberOfSales": number_of_sales,
     }
+
+
+def test_metrics_query_with_rollups(client, default_transaction):
+    filters = [
+        "",
+        """(after: "2021-01-01")""",
+        """(before: "2021-01-01")""",
+        """(after: "2020-01-01", before: "2021-01-01")""",
+        """(after: "2019-01-01", before: "2022-01-01")""",
+    ]
+    query = "query { metrics { "
+    query += " ".join(
+        f"""f{i}: numberOfFamiliesServed{f} b{i}: numberOfBeneficiariesServed{f}
+        s{i}: numberOfSales{f} t{i}: salesTimeseries{f} {{ date numberOfSales }}"""
+        for i, f in enumerate(filters)
+    )
+    query += " } }"
+    live_metrics = assert_successful_request(client, query, field="metrics")
+
+    # Aggregate the test transactions into daily rollups
+    assert refresh_rollups(until=date(2022, 1, 1)) == date(2022, 1, 1)
+    assert refresh_rollups(until=date(2022, 1, 1)) is None
+    db.close_db(None)
+    assert assert_successful_request(client, query, field="metrics") == live_metrics
+
+    # Metrics of aggregated days are computed from rollups only. Transactions after the
+    # watermark are taken into account
+    Transaction.delete().execute()
+    now = utcnow()
+    Transaction.create(**{**default_transaction, "created_on": now})
+    db.close_db(None)
+    metrics = assert_successful_request(client, query, field="metrics")
+    count = default_transaction["count"]
+    current_month = {
+        "date": now.date().replace(day=1).isoformat(),
+        "numberOfSales": count,
+    }
+    assert metrics == {
+        **live_metrics,
+        "s0": live_metrics["s0"] + count,
+        "s1": live_metrics["s1"] + count,
+        "t0": live_metrics["t0"] + [current_month],
+        "t1": live_metrics["t1"] + [current_month],
+    }
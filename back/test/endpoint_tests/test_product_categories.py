@@ -1,4 +1,7 @@
-from utils import assert_successful_request
+from boxtribute_server.db import db
+from boxtribute_server.models.definitions.product_category import ProductCategory
+from boxtribute_server.reference_data import invalidate_reference_data
+from utils import assert_query_budget, assert_successful_request
 
 
 def test_product_category_query(read_only_client, default_product_category):
@@ -34,3 +37,30 @@ def test_product_categories_query(read_only_client):
     queried_categories = assert_successful_request(read_only_client, query)
     assert len(queried_categories) == 5
     assert len([c for c in queried_categories if c["hasGender"]]) == 2
+
+
+def test_product_categories_cache(client, monkeypatch):
+    query = "query { productCategories { id } }"
+    # Sizes, size ranges, and product categories are loaded into the process-wide
+    # cache
+    _, count = assert_query_budget(client, query, max_queries=3)
+    assert count == 3
+    # Categories are served from the cache
+    _, count = assert_query_budget(client, query, max_queries=0)
+    assert count == 0
+
+    ProductCategory.create(id=20, name="Food", parent=None)
+    db.close_db(None)
+    queried_categories = assert_successful_request(client, query)
+    assert len(queried_categories) == 5
+
+    invalidate_reference_data()
+    queried_categories = assert_successful_request(client, query)
+    assert len(queried_categories) == 6
+
+    # Cache entry expires immediately
+    monkeypatch.setenv("REFERENCE_DATA_CACHE_TTL", "0")
+    invalidate_reference_data()
+    assert_query_budget(client, query, max_queries=3)
+    _, count = assert_query_budget(client, query, max_queries=3)
+    assert count == 3
@@ -0,0 +1,199 @@
+"""Budgets for the number of SQL statements executed by the main GraphQL queries of the
+front-end and the query API. A test fails if a change in resolvers introduces
+additional statements, e.g. by running a query per element of a list (N+1 problem).
+If a change reduces the number of statements, lower the budget accordingly.
+"""
+import pytest
+from boxtribute_server.db import db
+from boxtribute_server.enums import Language, TaggableObjectType
+from boxtribute_server.models.definitions.beneficiary import Beneficiary
+from boxtribute_server.models.definitions.box import Box
+from boxtribute_server.models.definitions.tags_relation import TagsRelation
+from boxtribute_server.models.definitions.x_beneficiary_language import (
+    XBeneficiaryLanguage,
+)
+from boxtribute_server.reference_data import warm_reference_data_cache
+from utils import assert_query_budget, assert_successful_request
+
+BOX_FIELDS = """labelIdentifier state numberOfItems comment
+    product { id name gender category { id name } }
+    size { id label }
+    location { id name ... on ClassicLocation { defaultBoxState } base { id name } }
+    tags { id name color }
+    history { id changes changeDate user { id name } }
+    shipmentDetail { id shipment { id state } }"""
+
+
+@pytest.mark.parametrize(
+    "query,max_queries,endpoint",
+    [
+        # BoxesForBase
+        [
+            f"""query {{ base(id: 1) {{ locations {{ name boxes {{ totalCount
+                elements {{ {BOX_FIELDS} }} }} }} }} }}""",
+            15,
+            "graphql",
+        ],
+        # BoxDetails
+        [
+            f"""query {{ box(labelIdentifier: "12345678") {{ {BOX_FIELDS} }} }}""",
+            7,
+            "graphql",
+        ],
+        # Beneficiaries
+        [
+            """query { beneficiaries { totalCount elements { id firstName lastName
+                tokens registered languages
+                tags { id name color } transactions { id tokens } } } }""",
+            6,
+            "graphql",
+        ],
+        # Shipments
+        [
+            """query { shipments { id state
+                details { id box { labelIdentifier product { name } }
+                    sourceProduct { name } sourceLocation { name } createdBy { id } }
+                sourceBase { id name organisation { id name } }
+                targetBase { id name organisation { id name } }
+                transferAgreement { id comment type }
+                startedBy { id name } sentBy { id name } } }""",
+            27,
+            "graphql",
+        ],
+        # TransferAgreements
+        [
+            """query { transferAgreements { id type state
+                sourceOrganisation { id name } sourceBases { id name }
+                targetOrganisation { id name } targetBases { id name }
+                shipments { id state sourceBase { id name } targetBase { id name } }
+                requestedBy { id name } acceptedBy { id name } } }""",
+            27,
+            "graphql",
+        ],
+        # AllProductsAndLocationsForBase
+        [
+            """query { base(id: 1) {
+                tags(resourceType: Box) { id name color }
+                locations { id name ... on ClassicLocation { defaultBoxState } }
+                products { id name gender category { id name }
+                    sizeRange { id label sizes { id label } } } } }""",
+            4,
+            "graphql",
+        ],
+        # Metrics: sales-related fields of the same date range are computed together
+        [
+            """query { metrics { numberOfFamiliesServed numberOfBeneficiariesServed
+                numberOfSales
+                families2021: numberOfFamiliesServed(after: "2021-01-01")
+                sales2021: numberOfSales(after: "2021-01-01")
+                stockOverview { numberOfBoxes numberOfItems }
+                movedStockOverview { productCategoryName numberOfBoxes }
+                salesTimeseries(interval: Week) { date numberOfSales }
+                movedStockTimeseries { date numberOfBoxes } } }""",
+            9,
+            "graphql",
+        ],
+        # Products via query API
+        [
+            """query { products(paginationInput: { first: 500 }) { elements { id name
+                gender category { name } sizeRange { sizes { id label } } } } }""",
+            1,
+            "",
+        ],
+    ],
+)
+def test_query_budget(read_only_client, query, max_queries, endpoint):
+    # In steady state, reference data (sizes, product categories, etc.) is served from
+    # the process-wide cache
+    warm_reference_data_cache()
+    assert_query_budget(
+        read_only_client, query, max_queries=max_queries, endpoint=endpoint
+    )
+
+
+def test_query_budget_independent_of_number_of_boxes(client, default_box, tags):
+    # Add boxes to the location of the default box, and tag them
+    number_of_boxes = 50
+    boxes = [
+        {
+            **default_box,
+            "id": 100 + i,
+            "label_identifier": f"{100 + i:08}",
+            "qr_code": None,
+        }
+        for i in range(number_of_boxes)
+    ]
+    Box.insert_many(boxes).execute()
+    TagsRelation.insert_many(
+        [
+            {
+                "object_id": box["id"],
+                "object_type": TaggableObjectType.Box,
+                "tag": tags[1]["id"],
+            }
+            for box in boxes
+        ]
+    ).execute()
+    # Release connection such that the app can open it when handling the request
+    db.close_db(None)
+    warm_reference_data_cache()
+
+    query = f"""query {{ location(id: {default_box["location"]}) {{
+        boxes(paginationInput: {{ first: 100 }}) {{ elements {{
+            labelIdentifier
+            product {{ id name gender }}
+            size {{ id label }}
+            location {{ id name base {{ id name }} }}
+            tags {{ id name color }}
+            shipmentDetail {{ id }}
+            history {{ id changes user {{ id }} }}
+        }} }} }} }}"""
+    data, _ = assert_query_budget(client, query, max_queries=9)
+    assert len(data["location"]["boxes"]["elements"]) > number_of_boxes
+
+
+def test_query_budget_independent_of_number_of_beneficiaries(
+    client, default_beneficiary, tags
+):
+    number_of_beneficiaries = 50
+    beneficiaries = [
+        {**default_beneficiary, "id": 100 + i} for i in range(number_of_beneficiaries)
+    ]
+    Beneficiary.insert_many(beneficiaries).execute()
+    TagsRelation.insert_many(
+        [
+            {
+                "object_id": beneficiary["id"],
+                "object_type": TaggableObjectType.Beneficiary,
+                "tag": tags[0]["id"],
+            }
+            for beneficiary in beneficiaries
+        ]
+    ).execute()
+    XBeneficiaryLanguage.insert_many(
+        [
+            {"beneficiary": beneficiary["id"], "language": language.value}
+            for beneficiary in beneficiaries
+            for language in [Language.en, Language.ar]
+        ]
+    ).execute()
+    # Release connection such that the app can open it when handling the request
+    db.close_db(None)
+    warm_reference_data_cache()
+
+    query = """query { beneficiaries(paginationInput: { first: 100 }) {
+        elements { id tokens languages tags { id name color }
+            transactions { id tokens } } } }"""
+    data, _ = assert_query_budget(client, query, max_queries=7)
+    elements = data["beneficiaries"]["elements"]
+    assert len(elements) > number_of_beneficiaries
+    assert elements[-1]["languages"] == ["en", "ar"]
+
+
+def test_mutation_budget(client, default_box, sql_query_recorder):
+    mutation = f"""mutation {{ updateBox(updateInput: {{
+        labelIdentifier: "{default_box["label_identifier"]}", comment: "updated" }}) {{
+            labelIdentifier comment product {{ id }} tags {{ id }} }} }}"""
+    assert_successful_request(client, mutation)
+    # Includes locking the box for updating the stock overview counters
+    assert sql_query_recorder.count <= 18
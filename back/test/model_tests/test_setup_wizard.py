@@ -4,13 +4,27 @@ import tempfile
 
 import peewee
 import pytest
+from boxtribute_server.business_logic.metrics.crud import compute_stock_overview
+from boxtribute_server.business_logic.metrics.stock_overview import (
+    reconcile_stock_overview,
+)
+from boxtribute_server.models.definitions.box import Box
+from boxtribute_server.models.definitions.daily_sales import DailySales
+from boxtribute_server.models.definitions.daily_served_beneficiary import (
+    DailyServedBeneficiary,
+)
 from boxtribute_server.models.definitions.product import Product
+from boxtribute_server.models.definitions.stock_overview_counter import (
+    StockOverviewCounter,
+)
 from boxtribute_server.setup_wizard import (
     PRODUCT_COLUMN_NAMES,
     _clone_products,
     _create_db_interface,
     _import_products,
     _parse_options,
+    _reconcile_stock_overview,
+    _refresh_metrics,
 )
 
 
@@ -129,6 +143,27 @@ def test_parse_options():
         "verbose": False,
     }
 
+    assert _parse_options("refresh-metrics".split()) == {
+        "command": "refresh-metrics",
+        "database": None,
+        "password": None,
+        "user": None,
+        "host": "127.0.0.1",
+        "port": 3386,
+        "verbose": False,
+    }
+
+    assert _parse_options("reconcile-stock-overview -n".split()) == {
+        "command": "reconcile-stock-overview",
+        "dry_run": True,
+        "database": None,
+        "password": None,
+        "user": None,
+        "host": "127.0.0.1",
+        "port": 3386,
+        "verbose": False,
+    }
+
     assert isinstance(
         _create_db_interface(
             password="dropapp_root",
@@ -191,3 +226,50 @@ def test_clone_products(default_product):
         _clone_products(source_base_id=0, target_base_id=1)
     with pytest.raises(ValueError):
         _clone_products(source_base_id=1, target_base_id=0)
+
+
+def test_refresh_metrics(default_transaction, relative_transaction):
+    _refresh_metrics()
+    sales = list(
+        DailySales.select(DailySales.date, DailySales.number_of_sales)
+        .order_by(DailySales.date)
+        .tuples()
+    )
+    # The relative and the other test transaction are performed at the same time
+    assert sales == [
+        (relative_transaction["created_on"].date(), 2 * relative_transaction["count"]),
+        (default_transaction["created_on"].date(), default_transaction["count"]),
+    ]
+    assert DailyServedBeneficiary.select().count() == 3
+
+    # Already aggregated days are not processed again
+    _refresh_metrics()
+    assert DailySales.select().count() == 2
+
+
+def test_reconcile_stock_overview(default_box, default_organisation):
+    # The boxes of the test data are not counted yet. A dry run only reports drift
+    overview = compute_stock_overview(organisation_id=default_organisation["id"])
+    _reconcile_stock_overview(dry_run=True)
+    assert StockOverviewCounter.select().count() == 0
+
+    _reconcile_stock_overview()
+    assert StockOverviewCounter.select().count() > 0
+    assert (
+        compute_stock_overview(organisation_id=default_organisation["id"]) == overview
+    )
+    assert reconcile_stock_overview(repair=False) == []
+
+    # Drift caused by changes outside of the app is detected and repaired
+    number_of_items = default_box["number_of_items"]
+    Box.update(number_of_items=number_of_items + 5).where(
+        Box.id == default_box["id"]
+    ).execute()
+    drift = reconcile_stock_overview(repair=False)
+    assert len(drift) == 1
+    assert drift[0]["number_of_items"] == drift[0]["counted_number_of_items"] + 5
+    _reconcile_stock_overview()
+    assert compute_stock_overview(organisation_id=default_organisation["id"]) == {
+        **overview,
+        "number_of_items": overview["number_of_items"] + 5,
+    }
@@ -1,6 +1,20 @@
+import time
+
 import pytest
-from boxtribute_server.auth import get_token_from_auth_header
+from auth import create_jwt_payload
+from boxtribute_server.auth import (
+    PublicKeyCache,
+    authenticate,
+    decode_jwt,
+    get_key_id,
+    get_public_key,
+    get_token_from_auth_header,
+    public_key_cache,
+    verified_token_cache,
+)
+from boxtribute_server.cache import CacheInfo
 from boxtribute_server.exceptions import AuthenticationFailed
+from jose import jwt
 
 
 def test_get_invalid_jwt_no_auth_header():
@@ -21,3 +35,119 @@ def test_get_invalid_jwt_bearer_no_token():
 def test_get_invalid_jwt_bearer_with_additonal_data():
     with pytest.raises(AuthenticationFailed):
         get_token_from_auth_header("bearer token additional")
+
+
+def test_public_key_cache(jwks_server):
+    domain = jwks_server.domain
+    cache = PublicKeyCache(ttl=60, min_refresh_interval=0)
+
+    key = cache.get(domain, "key-1")
+    assert key["kid"] == "key-1"
+    assert cache.get(domain) == key
+    assert cache.get(domain, "key-1") == key
+    assert jwks_server.request_count == 1
+    assert cache.cache_info() == CacheInfo(
+        hits=2, misses=1, maxsize=None, currsize=1, refreshes=0
+    )
+
+    # Key rotation: unknown key ID triggers refresh
+    jwks_server.add_key("key-2")
+    assert cache.get(domain, "key-2")["kid"] == "key-2"
+    assert cache.get(domain, "key-1")["kid"] == "key-1"
+    assert jwks_server.request_count == 2
+    assert cache.cache_info() == CacheInfo(
+        hits=3, misses=2, maxsize=None, currsize=1, refreshes=1
+    )
+
+    # Revoked key remains cached until expiry; unknown key ID can't be found at all
+    jwks_server.remove_key("key-1")
+    assert cache.get(domain, "key-1")["kid"] == "key-1"
+    with pytest.raises(AuthenticationFailed):
+        cache.get(domain, "key-3")
+    assert jwks_server.request_count == 3
+
+    cache.clear()
+    assert cache.cache_info() == CacheInfo(
+        hits=0, misses=0, maxsize=None, currsize=0, refreshes=0
+    )
+
+
+def test_public_key_cache_expiry(jwks_server):
+    domain = jwks_server.domain
+    cache = PublicKeyCache(ttl=0)
+    cache.get(domain, "key-1")
+    cache.get(domain, "key-1")
+    assert jwks_server.request_count == 2
+
+
+def test_public_key_cache_rate_limits_refresh(jwks_server):
+    domain = jwks_server.domain
+    cache = PublicKeyCache(ttl=60, min_refresh_interval=60)
+    cache.get(domain, "key-1")
+
+    jwks_server.add_key("key-2")
+    with pytest.raises(AuthenticationFailed):
+        cache.get(domain, "key-2")
+    with pytest.raises(AuthenticationFailed):
+        cache.get(domain, "unknown-key")
+    assert jwks_server.request_count == 1
+
+
+def test_decode_jwt_with_cached_public_key(jwks_server):
+    domain = jwks_server.domain
+    audience = "boxtribute-test-api"
+    payload = {"sub": "auth0|8", "aud": audience, "iss": f"https://{domain}/"}
+    token = jwks_server.create_jwt(payload, key_id="key-1")
+
+    for _ in range(3):
+        public_key = get_public_key(domain, key_id=get_key_id(token))
+        assert decode_jwt(
+            token=token, public_key=public_key, domain=domain, audience=audience
+        ) == {"sub": "auth0|8", "aud": audience, "iss": f"https://{domain}/"}
+    assert jwks_server.request_count == 1
+    assert public_key_cache.cache_info().hits == 2
+
+    assert get_key_id("invalid.token") is None
+
+
+def test_authenticate_caches_verified_token(jwks_server, mocker):
+    domain = jwks_server.domain
+    audience = "boxtribute-test-api"
+    payload = create_jwt_payload()
+    payload.update(aud=audience, iss=f"https://{domain}/", exp=int(time.time()) + 3600)
+    token = jwks_server.create_jwt(payload, key_id="key-1")
+    verified_token_cache.clear()
+    decode = mocker.spy(jwt, "decode")
+
+    decoded_payload, user = authenticate(token, domain=domain, audience=audience)
+    assert decoded_payload["exp"] == payload["exp"]
+    assert user.id == 8
+    assert user.authorized_base_ids("stock:read") == [1]
+    assert authenticate(token, domain=domain, audience=audience) == (
+        decoded_payload,
+        user,
+    )
+    assert decode.call_count == 1
+    assert verified_token_cache.cache_info().hits == 1
+
+    # Token is verified again for a different audience
+    with pytest.raises(AuthenticationFailed):
+        authenticate(token, domain=domain, audience="other-api")
+
+    # Cached result is discarded once the token expires
+    mocker.patch("time.time").return_value = payload["exp"]
+    authenticate(token, domain=domain, audience=audience)
+    assert decode.call_count == 3
+    verified_token_cache.clear()
+
+
+def test_authenticate_does_not_cache_token_without_expiry(jwks_server):
+    domain = jwks_server.domain
+    audience = "boxtribute-test-api"
+    payload = create_jwt_payload()
+    payload.update(aud=audience, iss=f"https://{domain}/")
+    token = jwks_server.create_jwt(payload, key_id="key-1")
+    verified_token_cache.clear()
+
+    authenticate(token, domain=domain, audience=audience)
+    assert len(verified_token_cache) == 0
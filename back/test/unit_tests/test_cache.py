@@ -0,0 +1,37 @@
+import time
+
+from boxtribute_server.cache import CacheInfo, LRUCache
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    assert cache.get("a") is None
+    assert cache.get("a", 0) == 0
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    # Least recently used entry is evicted
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.cache_info() == CacheInfo(hits=3, misses=3, maxsize=2, currsize=2)
+
+    cache.delete("a")
+    cache.delete("a")
+    assert cache.get("a") is None
+
+    cache.clear()
+    assert cache.cache_info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_lru_cache_expiry():
+    cache = LRUCache()
+    now = time.time()
+    cache.set("a", 1, expires_at=now + 60)
+    cache.set("b", 2, expires_at=now - 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 1
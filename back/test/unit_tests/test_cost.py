@@ -0,0 +1,86 @@
+import pytest
+from boxtribute_server.graph_ql.cost import DEFAULT_LIST_SIZE, calculate_query_cost
+from boxtribute_server.graph_ql.schema import full_api_schema, query_api_schema
+from graphql import parse
+
+
+@pytest.mark.parametrize(
+    "query,cost",
+    [
+        # Scalar fields are free
+        ["query { base(id: 1) { id name } }", 1],
+        ["query { __typename }", 0],
+        ["query { bases { id } }", DEFAULT_LIST_SIZE],
+        ["query { bases { locations { id } } }", DEFAULT_LIST_SIZE * 11],
+        # Default page size is 50
+        ["query { beneficiaries { elements { id } } }", 51],
+        ["query { beneficiaries { totalCount } }", 2],
+        [
+            """query { beneficiaries(paginationInput: {first: 5}) {
+                elements { id tags { name } } pageInfo { hasNextPage } } }""",
+            1 + 5 * (1 + DEFAULT_LIST_SIZE) + 1,
+        ],
+        [
+            """query { base(id: 1) { locations {
+                boxes(paginationInput: {before: "MDAwMDAwMDE=", last: 20}) {
+                    elements { product { name } } } } } }""",
+            1 + DEFAULT_LIST_SIZE * (1 + 1 + 20 * 2),
+        ],
+        # Fragments
+        [
+            """query { box(labelIdentifier: "12345678") { ...BoxFields } }
+            fragment BoxFields on Box { product { id } location { id } }""",
+            3,
+        ],
+        [
+            """query { tag(id: 1) { taggedResources {
+                ... on Box { product { id } } ... on Beneficiary { id } } } }""",
+            1 + DEFAULT_LIST_SIZE * 2,
+        ],
+        # Expensive fields
+        ["query { metrics { numberOfSales stockOverview { numberOfBoxes } } }", 21],
+    ],
+)
+def test_calculate_query_cost(query, cost):
+    document = parse(query)
+    assert calculate_query_cost(query_api_schema, document) == cost
+    assert calculate_query_cost(full_api_schema, document) == cost
+
+
+def test_calculate_query_cost_with_variables():
+    query = """query Boxes($locationId: ID!, $paginationInput: PaginationInput) {
+        location(id: $locationId) { boxes(paginationInput: $paginationInput) {
+            elements { id } } } }
+        query Base { base(id: 1) { id } }"""
+    document = parse(query)
+
+    def cost(**kwargs):
+        return calculate_query_cost(query_api_schema, document, **kwargs)
+
+    assert (
+        cost(
+            variables={"locationId": 1, "paginationInput": {"first": 100}},
+            operation_name="Boxes",
+        )
+        == 102
+    )
+    assert cost(variables={"locationId": 1}, operation_name="Boxes") == 52
+    assert cost(operation_name="Base") == 1
+    # Invalid operation name or variables are reported during execution
+    assert cost(operation_name="Unknown") == 0
+    assert cost(variables={"locationId": None}, operation_name="Boxes") == 0
+    # Negative page sizes are rejected during execution, and don't reduce the cost
+    assert (
+        cost(
+            variables={"locationId": 1, "paginationInput": {"first": -100}},
+            operation_name="Boxes",
+        )
+        == 2
+    )
+
+
+def test_calculate_query_cost_with_negative_page_size():
+    query = """query {
+        a: beneficiaries(paginationInput: {first: -100000}) { elements { id } }
+        b: beneficiaries(paginationInput: {first: 100000}) { elements { id } } }"""
+    assert calculate_query_cost(query_api_schema, parse(query)) == 1 + 100_001
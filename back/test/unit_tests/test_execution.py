@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import pytest
+from boxtribute_server.graph_ql.execution import (
+    document_cache,
+    execute_graphql,
+    get_worker_event_loop,
+    parse_and_validate_query,
+    run_in_worker_event_loop,
+)
+from boxtribute_server.graph_ql.schema import full_api_schema, query_api_schema
+from graphql import GraphQLError
+
+
+async def _get_running_loop():
+    return asyncio.get_running_loop()
+
+
+def test_run_in_worker_event_loop():
+    loop = run_in_worker_event_loop(_get_running_loop())
+    assert run_in_worker_event_loop(_get_running_loop()) is loop
+    assert get_worker_event_loop() is loop
+    assert not loop.is_closed()
+
+    # Every thread uses its own event loop
+    loops = []
+    thread = threading.Thread(
+        target=lambda: loops.append(run_in_worker_event_loop(_get_running_loop()))
+    )
+    thread.start()
+    thread.join()
+    assert loops[0] is not loop
+
+    # A closed event loop is replaced
+    loop.close()
+    assert run_in_worker_event_loop(_get_running_loop()) is not loop
+
+
+def test_parse_and_validate_query():
+    document_cache.clear()
+    query = "query { organisations { name } }"
+    document, errors = parse_and_validate_query(
+        full_api_schema, query, introspection=False
+    )
+    assert not errors
+    assert parse_and_validate_query(full_api_schema, query, introspection=False) == (
+        document,
+        [],
+    )
+    assert document_cache.cache_info().hits == 1
+
+    # Separate cache entries per schema and introspection setting
+    parse_and_validate_query(query_api_schema, query, introspection=False)
+    parse_and_validate_query(full_api_schema, query, introspection=True)
+    assert document_cache.cache_info().misses == 3
+
+    # Invalid documents are not cached
+    invalid_query = "query { organisations { invalidField } }"
+    _, errors = parse_and_validate_query(
+        query_api_schema, invalid_query, introspection=True
+    )
+    assert len(errors) == 1
+    introspection_query = "query { __schema { types { name } } }"
+    _, errors = parse_and_validate_query(
+        full_api_schema, introspection_query, introspection=False
+    )
+    assert len(errors) == 1
+    assert len(document_cache) == 3
+
+    with pytest.raises(GraphQLError):
+        parse_and_validate_query(full_api_schema, "query {", introspection=True)
+    document_cache.clear()
+
+
+def test_execute_graphql():
+    data = {"query": "query { __typename }"}
+    for _ in range(2):
+        assert run_in_worker_event_loop(execute_graphql(query_api_schema, data)) == (
+            True,
+            {"data": {"__typename": "Query"}},
+        )
+
+    success, result = run_in_worker_event_loop(
+        execute_graphql(query_api_schema, {"query": "query {"})
+    )
+    assert not success
+    assert result["errors"][0]["message"].startswith("Syntax Error")
+
+    success, result = run_in_worker_event_loop(
+        execute_graphql(query_api_schema, {"query": "query { invalid }"})
+    )
+    assert not success
+    assert len(result["errors"]) == 1
+
+    success, result = run_in_worker_event_loop(execute_graphql(query_api_schema, {}))
+    assert not success
+    document_cache.clear()
+
+
+def test_execute_graphql_with_max_cost():
+    data = {"query": "query { bases { id } }"}
+    success, result = run_in_worker_event_loop(
+        execute_graphql(query_api_schema, data, max_cost=5)
+    )
+    assert not success
+    assert result["errors"][0]["extensions"]["code"] == "BAD_USER_INPUT"
+    assert result["extensions"] == {
+        "cost": {"requestedQueryCost": 10, "maximumCost": 5}
+    }
+
+    data = {"query": "query { __typename }"}
+    assert run_in_worker_event_loop(
+        execute_graphql(query_api_schema, data, max_cost=5)
+    ) == (
+        True,
+        {
+            "data": {"__typename": "Query"},
+            "extensions": {"cost": {"requestedQueryCost": 0, "maximumCost": 5}},
+        },
+    )
+    document_cache.clear()
@@ -0,0 +1,102 @@
+import asyncio
+
+import peewee
+from boxtribute_server.instrumentation import (
+    InstrumentedDatabaseMixin,
+    SqlQueryRecorder,
+    record_sql_queries,
+    resolver_path_middleware,
+)
+from graphql import build_schema, graphql, graphql_sync
+
+
+class InstrumentedSqliteDatabase(InstrumentedDatabaseMixin, peewee.SqliteDatabase):
+    pass
+
+
+def test_sql_query_recorder():
+    recorder = SqlQueryRecorder(slowest_statements_count=2)
+    assert recorder.statistics() == {
+        "queryCount": 0,
+        "totalDuration": 0,
+        "slowestQueries": [],
+    }
+
+    recorder.record("SELECT 1", 0.001)
+    recorder.record("SELECT 2", 0.003)
+    recorder.record("SELECT 3", 0.002)
+    assert recorder.statistics() == {
+        "queryCount": 3,
+        "totalDuration": 6.0,
+        "slowestQueries": [
+            {"sql": "SELECT 2", "duration": 3.0, "path": None},
+            {"sql": "SELECT 3", "duration": 2.0, "path": None},
+        ],
+    }
+
+
+def test_record_sql_queries():
+    database = InstrumentedSqliteDatabase(":memory:")
+    schema = build_schema("type Query { number: Int, numbers: [Int!]! }")
+
+    def resolve_number(*_):
+        return database.execute_sql("SELECT 1").fetchone()[0]
+
+    def resolve_numbers(*_):
+        return [database.execute_sql("SELECT 2").fetchone()[0]]
+
+    root_value = {"number": resolve_number, "numbers": resolve_numbers}
+
+    database.execute_sql("SELECT 0")
+    with record_sql_queries() as recorder:
+        with record_sql_queries() as inner_recorder:
+            database.execute_sql("SELECT 0")
+        result = graphql_sync(
+            schema,
+            "query { number numbers }",
+            root_value=root_value,
+            middleware=[resolver_path_middleware],
+        )
+    database.execute_sql("SELECT 0")
+
+    assert result.data == {"number": 1, "numbers": [2]}
+    assert inner_recorder.count == 1
+    assert recorder.count == 3
+    statistics = recorder.statistics()
+    assert sorted((q["sql"], q["path"]) for q in statistics["slowestQueries"]) == [
+        ("SELECT 0", None),
+        ("SELECT 1", "number"),
+        ("SELECT 2", "numbers"),
+    ]
+
+    # Middleware has no effect without active recorder
+    result = graphql_sync(
+        schema,
+        "query { number }",
+        root_value=root_value,
+        middleware=[resolver_path_middleware],
+    )
+    assert result.data == {"number": 1}
+
+
+def test_record_sql_queries_of_async_resolver():
+    database = InstrumentedSqliteDatabase(":memory:")
+    schema = build_schema("type Query { number: Int }")
+
+    async def resolve_number(*_):
+        await asyncio.sleep(0)
+        return database.execute_sql("SELECT 1").fetchone()[0]
+
+    async def run():
+        with record_sql_queries() as recorder:
+            result = await graphql(
+                schema,
+                "query { number }",
+                root_value={"number": resolve_number},
+                middleware=[resolver_path_middleware],
+            )
+        return result, recorder
+
+    result, recorder = asyncio.run(run())
+    assert result.data == {"number": 1}
+    assert recorder.statistics()["slowestQueries"][0]["path"] == "number"
@@ -0,0 +1,79 @@
+import hashlib
+
+import pytest
+from boxtribute_server.exceptions import (
+    InvalidPersistedQuery,
+    PersistedQueryHashMismatch,
+    PersistedQueryNotFound,
+)
+from boxtribute_server.graph_ql.persisted_queries import (
+    PersistedQueryStore,
+    resolve_persisted_query,
+)
+
+QUERY = "query { organisations { name } }"
+QUERY_HASH = hashlib.sha256(QUERY.encode()).hexdigest()
+
+
+def _persisted_query_data(query_hash, query=None):
+    data = {
+        "extensions": {"persistedQuery": {"version": 1, "sha256Hash": query_hash}},
+        "variables": {"a": 1},
+    }
+    if query is not None:
+        data["query"] = query
+    return data
+
+
+def test_resolve_persisted_query():
+    store = PersistedQueryStore(maxsize=2)
+    data = {"query": QUERY}
+    assert resolve_persisted_query(data, store=store) is data
+    assert resolve_persisted_query(None, store=store) is None
+    data = {"query": QUERY, "extensions": {}}
+    assert resolve_persisted_query(data, store=store) is data
+
+    with pytest.raises(PersistedQueryNotFound):
+        resolve_persisted_query(_persisted_query_data(QUERY_HASH), store=store)
+
+    with pytest.raises(PersistedQueryHashMismatch):
+        resolve_persisted_query(_persisted_query_data("abc", QUERY), store=store)
+
+    # Hash and query must be strings
+    for data in [
+        _persisted_query_data(QUERY_HASH, 1),
+        _persisted_query_data(1, QUERY),
+        _persisted_query_data({}),
+    ]:
+        with pytest.raises(InvalidPersistedQuery):
+            resolve_persisted_query(data, store=store)
+
+    # Register query, then send hash only
+    data = _persisted_query_data(QUERY_HASH, QUERY)
+    assert resolve_persisted_query(data, store=store) == data
+    assert resolve_persisted_query(
+        _persisted_query_data(QUERY_HASH), store=store
+    ) == _persisted_query_data(QUERY_HASH, QUERY)
+
+
+def test_persisted_query_store_with_backend():
+    backend = {}
+
+    class Backend:
+        def get(self, key):
+            return backend.get(key)
+
+        def set(self, key, value):
+            backend[key] = value
+
+    store = PersistedQueryStore(maxsize=1, backend=Backend())
+    store.set("a", "query A")
+    store.set("b", "query B")
+    assert backend == {"a": "query A", "b": "query B"}
+    assert store.cache.get("a") is None
+
+    # Another instance shares the backend
+    other_store = PersistedQueryStore(backend=Backend())
+    assert other_store.get("a") == "query A"
+    assert other_store.cache.get("a") == "query A"
+    assert other_store.get("c") is None
@@ -1,3 +1,6 @@
+from boxtribute_server.instrumentation import record_sql_queries
+
+
 def _assert_erroneous_request(
     client, query, *, code, verify_response=True, error_count=1, **kwargs
 ):
@@ -80,3 +83,47 @@ def assert_successful_request(client, query, field=None, endpoint="graphql"):
 
     field = field or _extract_field(query)
     return response.json["data"][field]
+
+
+def assert_query_budget(
+    client,
+    query,
+    *,
+    max_queries,
+    max_queries_per_element=0,
+    variables=None,
+    endpoint="graphql",
+):
+    """Send GraphQL request with query (and optional variables) using given client.
+    Assert response HTTP code 200 without errors, and that the number of executed SQL
+    statements does not exceed the budget of
+        max_queries + max_queries_per_element * (number of objects in response data)
+    The default `max_queries_per_element=0` asserts that the number of statements does
+    not grow with the size of the result (i.e. the resolvers have no N+1 problem).
+    Return the response data and the number of executed statements.
+    """
+    data = {"query": query, "variables": variables}
+    with record_sql_queries() as recorder:
+        response = client.post(f"/{endpoint}", json=data)
+    assert response.status_code == 200
+    assert "errors" not in response.json
+
+    result = response.json["data"]
+    budget = max_queries + max_queries_per_element * _count_objects(result)
+    slowest_statements = [
+        f"{q['path']}: {q['sql'][:80]}" for q in recorder.statistics()["slowestQueries"]
+    ]
+    assert recorder.count <= budget, (
+        f"Executed {recorder.count} SQL statements, exceeding the budget of {budget}. "
+        f"Slowest statements: {slowest_statements}"
+    )
+    return result, recorder.count
+
+
+def _count_objects(data):
+    """Return the number of objects (dicts) in the given response data."""
+    if isinstance(data, dict):
+        return 1 + sum(_count_objects(value) for value in data.values())
+    if isinstance(data, list):
+        return sum(_count_objects(value) for value in data)
+    return 0